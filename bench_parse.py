@@ -0,0 +1,83 @@
+"""
+Микро-бенчмарк разбора страницы поиска
+======================================
+Сравнивает бэкенды hh_parse по времени извлечения ID и проверяет, что множества ID совпадают.
+Отдельной строкой - parse_search_page (ID и карточки вакансий за один проход).
+
+    python bench_parse.py                 # синтетическая страница на 50 вакансий
+    python bench_parse.py page.html ...   # сохранённые страницы поиска hh.ru
+    python bench_parse.py -n 200          # число повторов
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from hh_parse import BACKENDS, available_backends, parse_search_page
+
+
+def synthetic_page(count: int = 50) -> str:
+    """Страница, похожая на выдачу hh.ru: большой inline-скрипт и карточки с несколькими ссылками"""
+    cards = []
+    for i in range(count):
+        vid = 100000000 + i
+        cards.append(
+            f'<div class="vacancy-serp-item" data-qa="vacancy-serp__vacancy"><h3><span>'
+            f'<a class="serp-item__title" data-qa="serp-item__title" target="_blank" '
+            f'href="https://hh.ru/vacancy/{vid}?from=vacancy_search_list&amp;query=python">Python developer</a>'
+            f'</span></h3><div class="compensation">100 000 – 200 000 ₽</div>'
+            f'<a data-qa="vacancy-serp__vacancy-employer" href="/employer/{i}">Компания {i}</a>'
+            f'<div data-qa="vacancy-serp__vacancy-address">Москва</div>'
+            f'<a href="/applicant/vacancy_response?vacancyId={vid}">Откликнуться</a>'
+            + '<span class="serp-item__meta">lorem ipsum dolor sit amet</span>' * 40
+            + "</div>"
+        )
+    script = "<script>window.__state = {" + ",".join(f'"k{i}": {i}' for i in range(20000)) + "};</script>"
+    return f"<html><head>{script}</head><body>{''.join(cards)}</body></html>"
+
+
+def bench(func, html, repeat: int) -> float:
+    """Среднее время одного разбора (мс)"""
+    func(html)  # прогрев
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(html)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк извлечения ID вакансий")
+    parser.add_argument("pages", nargs="*", type=Path, help="Сохранённые HTML-страницы поиска")
+    parser.add_argument("-n", "--repeat", type=int, default=50, help="Повторов на страницу")
+    args = parser.parse_args()
+
+    pages = [(path.name, path.read_text(encoding="utf-8")) for path in args.pages] or \
+            [("synthetic", synthetic_page())]
+    backends = available_backends()
+    missing = [name for name in BACKENDS if name not in backends]
+    if missing:
+        print(f"Не установлены: {', '.join(missing)}")
+
+    for name, html in pages:
+        print(f"\n{name}: {len(html.encode()) // 1024} КБ")
+        reference = BACKENDS["bs4"](html)
+        base = None
+        for backend in ["bs4"] + [b for b in backends if b != "bs4"]:
+            func = BACKENDS[backend]
+            ms = bench(func, html, args.repeat)
+            base = base or ms
+            same = "ok" if func(html) == reference else "РАЗЛИЧАЮТСЯ"
+            print(f"  {backend:<11} {ms:8.2f} мс  x{base / ms:5.1f}  ID: {len(func(html))} {same}")
+        # regex умеет разбирать байты без декодирования
+        ms = bench(BACKENDS["regex"], html.encode(), args.repeat)
+        same = "ok" if BACKENDS["regex"](html.encode()) == reference else "РАЗЛИЧАЮТСЯ"
+        print(f"  {'regex/bytes':<11} {ms:8.2f} мс  x{base / ms:5.1f}  ID: {len(reference)} {same}")
+        # ID + карточки вакансий тем же проходом
+        ms = bench(parse_search_page, html, args.repeat)
+        ids, records = parse_search_page(html)
+        same = "ok" if ids == reference else "РАЗЛИЧАЮТСЯ"
+        print(f"  {'+карточки':<11} {ms:8.2f} мс  x{base / ms:5.1f}  ID: {len(ids)} {same}, карточек: {len(records)}")
+
+
+if __name__ == "__main__":
+    main()
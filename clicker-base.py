@@ -1,18 +1,17 @@
-import requests
-from bs4 import BeautifulSoup
-import re
-import time
+from hh_http import HHClient
+from hh_parse import extract_ids, parse_search_page
+from keywords import KeywordMatcher
+from rate_limit import TokenBucket, RateLimiter
 import json
 
-def send_vacancy_response(resume_hash: str, vacancy_id: str, my_letter: str, headers: dict, cookies: dict) -> int:
+def send_vacancy_response(resume_hash: str, vacancy_id: str, my_letter: str, client: HHClient) -> int:
     """
     Отправляет отклик на вакансию на hh.ru с сопроводительным письмом.
 
     :param resume_hash: Идентификатор резюме (hash)
     :param vacancy_id: Идентификатор вакансии
     :param my_letter: Текст сопроводительного письма
-    :param headers: Заголовки для запроса
-    :param cookies: Куки для авторизации
+    :param client: Клиент hh.ru (заголовки и куки уже заданы)
     :return: HTTP статус-код ответа
     """
     url_response = "https://hh.ru/applicant/vacancy_response/popup"
@@ -27,7 +26,7 @@ def send_vacancy_response(resume_hash: str, vacancy_id: str, my_letter: str, hea
         "mark_applicant_visible_in_vacancy_country": (None, "false")
     }
 
-    response = requests.post(url_response, headers=headers, cookies=cookies, files=files)
+    response = client.post(url_response, files=files)
     print(f"[Отклик] Status: {response.status_code}")
     print(f"-{response.text}")
     json.loads(response.text)
@@ -38,13 +37,12 @@ def send_vacancy_response(resume_hash: str, vacancy_id: str, my_letter: str, hea
 
 
     return response.status_code
-def touch_resume(resume_hash: str, headers: dict, cookies: dict) -> int:
+def touch_resume(resume_hash: str, client: HHClient) -> int:
     """
     Поднимает резюме на hh.ru по переданному resume_hash.
 
     :param resume_hash: Идентификатор резюме (hash)
-    :param headers: Заголовки для запроса
-    :param cookies: Куки для авторизации
+    :param client: Клиент hh.ru (заголовки и куки уже заданы)
     :return: HTTP статус-код ответа
     """
     url_touch = "https://hh.ru/applicant/resumes/touch"
@@ -55,30 +53,23 @@ def touch_resume(resume_hash: str, headers: dict, cookies: dict) -> int:
         "undirectable": (None, "true")
     }
 
-    response = requests.post(url_touch, headers=headers, cookies=cookies, files=touch_files)
+    response = client.post(url_touch, files=touch_files)
     print(f"[Поднятие резюме] Status: {response.status_code}")
     return response.status_code
-def get_vacancy_ids(url: str, headers: dict, cookies: dict) -> list:
+def get_vacancy_ids(url: str, client: HHClient, exclude: KeywordMatcher = None) -> list:
     """
     Делает GET-запрос к hh.ru и возвращает список ID вакансий со страницы поиска.
 
     :param url: Ссылка на страницу поиска вакансий
-    :param headers: Заголовки запроса
-    :param cookies: Куки авторизации
+    :param client: Клиент hh.ru (заголовки и куки уже заданы)
+    :param exclude: Стоп-слова: вакансии с ними в названии пропускаются
     :return: Список ID вакансий
     """
-    response = requests.get(url, headers=headers, cookies=cookies)
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    vacancy_links = soup.find_all("a", href=re.compile(r"/vacancy/\d+"))
-    vacancy_ids = []
-
-    for link in vacancy_links:
-        match = re.search(r"/vacancy/(\d+)", link["href"])
-        if match:
-            vacancy_ids.append(match.group(1))
-
-    return list(set(vacancy_ids))
+    response = client.get(url)
+    if not exclude:
+        return list(extract_ids(response.content))
+    vacancy_ids, records = parse_search_page(response.content)
+    return [vid for vid in vacancy_ids if not exclude.matches((records.get(vid) or {}).get("title"))]
 
 
 url="<link>"
@@ -121,21 +112,30 @@ cookies = {
     "_xsrf": xsrf
 }
 
+# Темп запросов (в минуту): паузы между запросами выдерживает клиент
+requests_per_minute = 20
+
+# Одна keep-alive сессия на все запросы скрипта
+client = HHClient(headers, cookies, limiter=RateLimiter(TokenBucket(requests_per_minute)))
+
+# Стоп-слова в названии вакансии (например "senior", "стажёр") - на такие не откликаемся
+title_exclude = []
+stop_words = KeywordMatcher(title_exclude)
+
 
 
 spis_vacansy=[]
 
 for i in range(pages):
-    spis_vacansy+=get_vacancy_ids(url+f"&page={i}", headers, cookies)
+    spis_vacansy+=get_vacancy_ids(url+f"&page={i}", client, stop_words)
 
 print(spis_vacansy)
 print(len(spis_vacansy))
 
 
 
-for i in get_vacancy_ids(url, headers, cookies):
+for i in get_vacancy_ids(url, client, stop_words):
     print(1)
-    send_vacancy_response(resume_hash, i, my_letter, headers, cookies)
-    time.sleep(3)
+    send_vacancy_response(resume_hash, i, my_letter, client)
 
-touch_resume(resume_hash, headers, cookies) # поднятие резюме
\ No newline at end of file
+touch_resume(resume_hash, client) # поднятие резюме
\ No newline at end of file
@@ -1,6 +1,7 @@
-import requests
-from bs4 import BeautifulSoup
-import re
+from hh_http import HHClient
+from hh_parse import extract_ids, parse_search_page
+from keywords import KeywordMatcher
+from rate_limit import TokenBucket, RateLimiter
 import time
 from datetime import datetime
 from glom import glom
@@ -9,13 +10,12 @@ from tabulate import tabulate
 import time
 from datetime import datetime, timedelta
 
-def touch_resume(resume_hash: str, headers: dict, cookies: dict) -> int:
+def touch_resume(resume_hash: str, client: HHClient) -> int:
     """
     Поднимает резюме на hh.ru по переданному resume_hash.
 
     :param resume_hash: Идентификатор резюме (hash)
-    :param headers: Заголовки для запроса
-    :param cookies: Куки для авторизации
+    :param client: Клиент hh.ru (заголовки и куки уже заданы)
     :return: HTTP статус-код ответа
     """
     url_touch = "https://hh.ru/applicant/resumes/touch"
@@ -26,7 +26,7 @@ def touch_resume(resume_hash: str, headers: dict, cookies: dict) -> int:
         "undirectable": (None, "true")
     }
 
-    response = requests.post(url_touch, headers=headers, cookies=cookies, files=touch_files)
+    response = client.post(url_touch, files=touch_files)
     print(f"[Поднятие резюме] Status: {response.status_code}")
     return response.status_code
 
@@ -34,8 +34,7 @@ def send_vacancy_response(
     resume_hash: str,
     vacancy_id: str,
     my_letter: str,
-    headers: dict,
-    cookies: dict,
+    client: HHClient,
     response_number: int = None,
     total_responses: int = None
 ) -> int:
@@ -54,7 +53,7 @@ def send_vacancy_response(
         "mark_applicant_visible_in_vacancy_country": (None, "false")
     }
 
-    response = requests.post(url_response, headers=headers, cookies=cookies, files=files)
+    response = client.post(url_response, files=files)
 
     if response.status_code != 200:
         print(f"❌ Ошибка отправки отклика. Код: {response.status_code}")
@@ -118,17 +117,15 @@ def send_vacancy_response(
 
     return response.status_code, response.text
 
-def get_vacancy_ids(url, headers, cookies,numb):
-    response = requests.get(url, headers=headers, cookies=cookies)
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    vacancy_links = soup.find_all("a", href=re.compile(r"/vacancy/\d+"))
-    vacancy_ids = set()
-
-    for link in vacancy_links:
-        match = re.search(r"/vacancy/(\d+)", link["href"])
-        if match:
-            vacancy_ids.add(match.group(1))
+def get_vacancy_ids(url, client, numb, exclude: KeywordMatcher = None):
+    response = client.get(url)
+    if exclude:
+        # Названия вакансий из карточек страницы - тем же проходом, что и ID
+        vacancy_ids, records = parse_search_page(response.content)
+        vacancy_ids = {vid for vid in vacancy_ids
+                       if not exclude.matches((records.get(vid) or {}).get("title"))}
+    else:
+        vacancy_ids = extract_ids(response.content)
 
     print(f"🔎 С {numb} страницы получено {len(vacancy_ids)} вакансий")
 
@@ -176,6 +173,16 @@ cookies = {
     "_xsrf": xsrf
 }
 
+# Темп запросов (в минуту): паузы между запросами выдерживает клиент
+requests_per_minute = 20
+
+# Одна keep-alive сессия на все запросы скрипта
+client = HHClient(headers, cookies, limiter=RateLimiter(TokenBucket(requests_per_minute)))
+
+# Стоп-слова в названии вакансии (например "senior", "стажёр") - на такие не откликаемся
+title_exclude = []
+stop_words = KeywordMatcher(title_exclude)
+
 all_vacancies = set()
 
 
@@ -194,7 +201,7 @@ while True:
     # 🟡 Поднятие резюме раз в 4 часа 10 минут
     if now - last_resume_lift >= resume_lift_interval:
         print(f"\n🕓 {now.strftime('%H:%M:%S')} — Поднимаю резюме...\n")
-        touch_resume(resume_hash, headers, cookies)
+        touch_resume(resume_hash, client)
         last_resume_lift = now
 
     # 🔁 Попытка откликнуться раз в 2 часа
@@ -206,15 +213,14 @@ while True:
         # Получение вакансий
         for i in range(int(pages)):  # или больше страниц
             current_page_url = f"{url}&page={i}"
-            vacancies = get_vacancy_ids(current_page_url, headers, cookies, i)
+            vacancies = get_vacancy_ids(current_page_url, client, i, stop_words)
             all_vacancies.update(vacancies)
-            time.sleep(2)
 
         print(f"\n🚩 Всего вакансий получено: {len(all_vacancies)}\n")
 
         for idx, vacancy_id in enumerate(all_vacancies, 1):
             print(f"➡️ Отклик {idx}/{len(all_vacancies)} на вакансию ID: {vacancy_id}")
-            status_code, response_text = send_vacancy_response(resume_hash, vacancy_id, my_letter, headers, cookies)
+            status_code, response_text = send_vacancy_response(resume_hash, vacancy_id, my_letter, client)
 
             if status_code != 200:
                 print(f"❌ Ошибка отправки отклика. Код: {status_code}")
@@ -228,8 +234,6 @@ while True:
                     print(f"⚠️ Ответ от сервера: {status_code}. Повторная попытка через 2 часа.")
                     break  # Прерываем цикл и ждём 2 часа
 
-            time.sleep(3)
-
         print("\n✅ Все отклики (кроме ошибок) отправлены.")
         last_response_attempt = now
 
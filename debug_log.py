@@ -0,0 +1,154 @@
+"""
+Отладочный лог
+==============
+log_debug() только кладёт строку в очередь; в файл пишет отдельный поток пачками.
+Файл ротируется по размеру, старые части сжимаются в .gz.
+Сообщения ниже установленного уровня отбрасываются сразу, без форматирования и записи.
+"""
+
+import atexit
+import gzip
+import logging
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+
+class DebugLog:
+    """Файл лога с фоновым писателем и ротацией"""
+
+    def __init__(self, path: Path, level: int = INFO, max_bytes: int = 10 * 1024 * 1024,
+                 backups: int = 5, flush_interval: float = 1.0, queue_size: int = 10000):
+        """
+        :param path: Файл лога
+        :param level: Минимальный уровень записываемых сообщений
+        :param max_bytes: Размер файла, после которого он ротируется (0 - без ротации)
+        :param backups: Сколько сжатых частей хранить
+        :param flush_interval: Как часто писатель сбрасывает накопленное на диск (секунды)
+        :param queue_size: Предел очереди; при переполнении сообщения отбрасываются
+        """
+        self.path = Path(path)
+        self.level = level
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="debug-log-writer", daemon=True)
+        self._thread.start()
+
+    def enabled_for(self, level: int) -> bool:
+        return level >= self.level
+
+    def write(self, message: str, level: int = DEBUG):
+        if level < self.level:
+            return
+        try:
+            self._queue.put_nowait((time.time(), message))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Дописать очередь и остановить писателя"""
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        f = open(self.path, "a", encoding="utf-8")
+        try:
+            while not (self._stop.is_set() and self._queue.empty()):
+                try:
+                    batch = [self._queue.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+                # Забираем всё накопившееся и пишем одним вызовом
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                f.write("".join(
+                    f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))}] {message}\n"
+                    for ts, message in batch
+                ))
+                f.flush()
+                if self.max_bytes and f.tell() >= self.max_bytes:
+                    f.close()
+                    self._rotate()
+                    f = open(self.path, "a", encoding="utf-8")
+        finally:
+            f.close()
+
+    def _rotate(self):
+        """debug.log -> debug.log.1.gz, debug.log.1.gz -> debug.log.2.gz, ..."""
+        def part(i: int) -> Path:
+            return self.path.with_name(f"{self.path.name}.{i}.gz")
+
+        try:
+            part(self.backups).unlink(missing_ok=True)
+            for i in range(self.backups - 1, 0, -1):
+                if part(i).exists():
+                    part(i).replace(part(i + 1))
+            if self.backups > 0:
+                with open(self.path, "rb") as src, gzip.open(part(1), "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            self.path.unlink()
+        except OSError:
+            pass  # не смогли ротировать - продолжаем писать в тот же файл
+
+
+_log = None
+
+
+def setup_debug_log(path: Path, level="INFO", max_mb: float = 10, backups: int = 5) -> DebugLog:
+    """Запустить писатель лога (повторный вызов заменяет предыдущий)"""
+    global _log
+    if _log is not None:
+        _log.close()
+    _log = DebugLog(path, level=_level(level), max_bytes=int(max_mb * 1024 * 1024), backups=backups)
+    return _log
+
+
+def set_debug_level(level):
+    if _log is not None:
+        _log.level = _level(level)
+
+
+def debug_enabled(level: int = DEBUG) -> bool:
+    """Будет ли записано сообщение этого уровня (для дорогой подготовки сообщений)"""
+    return _log is not None and _log.enabled_for(level)
+
+
+def debug_dropped() -> int:
+    """Сколько сообщений отброшено из-за переполненной очереди"""
+    return _log.dropped if _log is not None else 0
+
+
+def log_debug(message: str, level: int = DEBUG):
+    """Записать сообщение в отладочный лог (без блокировки на файловых операциях)"""
+    if _log is not None:
+        _log.write(message, level)
+
+
+def _level(level) -> int:
+    """Имя уровня из LEVELS или число; неизвестное имя - INFO"""
+    if isinstance(level, str):
+        return logging.getLevelName(level.upper()) if level.upper() in LEVELS else INFO
+    return level
+
+
+@atexit.register
+def _flush_on_exit():
+    if _log is not None:
+        _log.close()
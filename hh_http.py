@@ -0,0 +1,202 @@
+"""
+HTTP-клиент hh.ru
+=================
+Долгоживущие сессии для воркеров аккаунтов: один event loop и один пул keep-alive
+соединений на аккаунт, которые переиспользуются между URL и циклами.
+HHClient - синхронный вариант на requests.Session для скриптов clicker*.py.
+Если передан RateLimiter, каждый запрос перед отправкой ждёт его разрешения - до начала
+запроса, так что ожидание токена не съедает таймаут самого запроса;
+если передан AimdPacer, исход каждого запроса (статус, таймаут, обрыв) подстраивает темп.
+"""
+
+import asyncio
+import ssl
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from rate_limit import RateLimiter, AimdPacer
+
+
+def make_ssl_context() -> ssl.SSLContext:
+    """SSL context без проверки сертификата (как и раньше в multi-v2.py)"""
+    ssl_context = ssl.create_default_context()
+    ssl_context.check_hostname = False
+    ssl_context.verify_mode = ssl.CERT_NONE
+    return ssl_context
+
+
+def form_data(fields: dict) -> aiohttp.FormData:
+    """multipart/form-data из простых полей (аналог files={"k": (None, v)} в requests)"""
+    return aiohttp.FormData(fields, default_to_multipart=True)
+
+
+class _LimitedRequest:
+    """async with: сначала токен ограничителя, потом запрос (его ClientTimeout стартует уже после ожидания)"""
+
+    def __init__(self, owner, method: str, url: str, kwargs: dict):
+        self._owner = owner
+        self._method = method
+        self._url = url
+        self._kwargs = kwargs
+        self._ctx = None
+
+    async def __aenter__(self) -> aiohttp.ClientResponse:
+        session = await self._owner.session()
+        if self._owner.limiter is not None:
+            await self._owner.limiter.acquire_async()
+        self._ctx = session.request(self._method, self._url, **self._kwargs)
+        return await self._ctx.__aenter__()
+
+    async def __aexit__(self, *exc):
+        return await self._ctx.__aexit__(*exc)
+
+
+class AccountSession:
+    """
+    Event loop и aiohttp-сессия одного аккаунта.
+    Используется из одного потока (воркера аккаунта): корутины запускаются через run().
+    Запросы делаются через get()/post() сессии аккаунта (async with, как у aiohttp):
+    они ждут RateLimiter и только потом начинают запрос.
+    """
+
+    def __init__(self, headers: dict, cookies: dict, limit: int = 10,
+                 dns_cache_ttl: int = 300, keepalive_timeout: float = 30, limiter: RateLimiter = None,
+                 pacer: AimdPacer = None):
+        """
+        :param headers: Заголовки для всех запросов
+        :param cookies: Куки авторизации
+        :param limit: Максимум одновременных соединений в пуле
+        :param dns_cache_ttl: Сколько секунд кэшировать DNS
+        :param keepalive_timeout: Сколько секунд держать простаивающее соединение
+        :param limiter: Ограничитель частоты для всех запросов сессии
+        :param pacer: Адаптивный регулятор темпа, получающий исходы запросов
+        """
+        self.headers = headers
+        self.cookies = cookies
+        self.limit = limit
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.limiter = limiter
+        self.pacer = pacer
+        self.loop = asyncio.new_event_loop()
+        self._session = None
+
+    def run(self, coro):
+        """Выполнить корутину в loop аккаунта (блокирует вызывающий поток)"""
+        return self.loop.run_until_complete(coro)
+
+    def call(self, func, *args):
+        """Выполнить корутину func(session, *args), где session - эта сессия аккаунта"""
+        return self.run(func(self, *args))
+
+    def get(self, url: str, **kwargs) -> _LimitedRequest:
+        return _LimitedRequest(self, "GET", url, kwargs)
+
+    def post(self, url: str, **kwargs) -> _LimitedRequest:
+        return _LimitedRequest(self, "POST", url, kwargs)
+
+    async def session(self) -> aiohttp.ClientSession:
+        """Общая сессия аккаунта; создаётся при первом обращении внутри loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                ssl=make_ssl_context(),
+                limit=self.limit,
+                limit_per_host=self.limit,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            trace = aiohttp.TraceConfig()
+            if self.pacer is not None:
+                trace.on_connection_queued_start.append(self._on_queued)
+                trace.on_request_end.append(self._on_response)
+                trace.on_request_exception.append(self._on_exception)
+            trace_configs = [trace] if self.pacer is not None else []
+            self._session = aiohttp.ClientSession(headers=self.headers, cookies=self.cookies,
+                                                  connector=connector, trace_configs=trace_configs)
+        return self._session
+
+    async def _on_response(self, session, context, params):
+        status = params.response.status
+        if status == 429:
+            self.pacer.throttle()
+        elif status >= 500:
+            self.pacer.error()
+        else:
+            self.pacer.success()  # 4xx (тест, лимит, уже откликались) - нормальный ответ
+
+    async def _on_queued(self, session, context, params):
+        context.queued = True
+
+    async def _on_exception(self, session, context, params):
+        if isinstance(params.exception, asyncio.TimeoutError):
+            # Если запрос ждал свободного соединения пула, часть таймаута ушла на ожидание -
+            # это своя теснота, а не перегрузка hh.ru: темп снижаем только за чистые таймауты
+            if not getattr(context, "queued", False):
+                self.pacer.throttle()
+        else:
+            self.pacer.error()
+
+    def close(self):
+        if self._session is not None and not self._session.closed:
+            self.run(self._session.close())
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        self.loop.close()
+
+
+class HHClient:
+    """
+    Синхронный клиент hh.ru: одна keep-alive сессия requests с повторами.
+    Заголовки и куки задаются один раз при создании.
+    """
+
+    def __init__(self, headers: dict, cookies: dict, retries: int = 3, backoff: float = 1.0,
+                 pool_size: int = 10, timeout: float = 15, limiter: RateLimiter = None):
+        """
+        :param headers: Заголовки для всех запросов
+        :param cookies: Куки авторизации
+        :param retries: Сколько раз повторять запрос при сетевой ошибке или 5xx
+        :param backoff: Базовая пауза между повторами (растёт экспоненциально)
+        :param pool_size: Размер пула соединений
+        :param timeout: Таймаут запроса по умолчанию (секунды)
+        :param limiter: Ограничитель частоты для всех запросов клиента
+        """
+        self.timeout = timeout
+        self.limiter = limiter
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.session.cookies.update(cookies)
+
+        # POST повторяется только если запрос не дошёл до сервера (ошибка соединения),
+        # иначе можно отправить отклик дважды
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        if self.limiter is not None:
+            self.limiter.acquire()
+        return self.session.request(method, url, **kwargs)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,257 @@
+"""
+Разбор страниц поиска hh.ru
+===========================
+Извлечение ID вакансий из ссылок <a href=".../vacancy/<id>..."> страницы поиска.
+
+Бэкенды дают одинаковые множества ID:
+    regex       - один проход регулярным выражением по тексту (str или bytes), без дерева документа
+    lxml        - если установлен lxml
+    selectolax  - если установлен selectolax
+    bs4         - BeautifulSoup(html.parser), как раньше; эталон для сравнения
+
+Как и у HTML-парсеров, ссылки внутри <script>, <style> и комментариев не считаются.
+
+parse_search_page() тем же проходом регулярного выражения собирает и карточки вакансий
+(название, компания, зарплата, город, время публикации): из встроенного состояния страницы
+(<template id="HH-Lux-InitialState">) и из разметки карточек (атрибуты data-qa).
+"""
+
+import html as html_lib
+import json
+import re
+
+from bs4 import BeautifulSoup
+from glom import glom
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+VACANCY_HREF_RE = re.compile(r"/vacancy/(\d+)")
+
+# Теги <a> и блоки, содержимое которых не разбирается как разметка
+_TOKEN = r"""<(?:script|style)\b.*?</(?:script|style)\s*>|<!--.*?-->|<a\s((?:[^>"']|"[^"]*"|'[^']*')*)>"""
+_HREF = r"""(?:^|\s)href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))"""
+
+_TOKEN_RE = re.compile(_TOKEN, re.S | re.I)
+_HREF_RE = re.compile(_HREF, re.I)
+_TOKEN_RE_B = re.compile(_TOKEN.encode(), re.S | re.I)
+_HREF_RE_B = re.compile(_HREF.encode(), re.I)
+_VACANCY_RE_B = re.compile(rb"/vacancy/(\d+)")
+
+
+def extract_ids_regex(html) -> set:
+    """ID вакансий одним проходом регулярного выражения (html - str или bytes)"""
+    if isinstance(html, (bytes, bytearray)):
+        token_re, href_re, vacancy_re = _TOKEN_RE_B, _HREF_RE_B, _VACANCY_RE_B
+    else:
+        token_re, href_re, vacancy_re = _TOKEN_RE, _HREF_RE, VACANCY_HREF_RE
+
+    ids = set()
+    for token in token_re.finditer(html):
+        attrs = token.group(1)
+        if not attrs:
+            continue  # <script>, <style>, комментарий или <a> без атрибутов
+        href = href_re.search(attrs)
+        if href is None:
+            continue
+        m = vacancy_re.search(href.group(1) or href.group(2) or href.group(3) or "")
+        if m:
+            ids.add(m.group(1))
+    if isinstance(html, (bytes, bytearray)):
+        return {vid.decode() for vid in ids}
+    return ids
+
+
+# Проход parse_search_page: те же токены + элементы карточек и состояние страницы
+_CARD_QA = {
+    "serp-item__title": "title",
+    "vacancy-serp__vacancy-employer": "company",
+    "vacancy-serp__vacancy-compensation": "salary",
+    "vacancy-serp__vacancy-address": "area",
+}
+_PAGE_TOKEN_RE = re.compile(
+    _TOKEN
+    + r"""|<(?:span|div)\s((?:[^>"']|"[^"]*"|'[^']*')*?data-qa="(?:vacancy-serp__vacancy-(?:compensation|address))"(?:[^>"']|"[^"]*"|'[^']*')*)>"""
+    + r"""|(?P<template><template\s[^>]*?id="HH-Lux-InitialState"[^>]*>)""",
+    re.S | re.I,
+)
+_DATA_QA_RE = re.compile(r"""\bdata-qa\s*=\s*["']([^"']*)["']""", re.I)
+_TAG_RE = re.compile(r"<[^>]*>")
+_CLOSE_A_RE = re.compile(r"</a\s*>", re.I)
+_CLOSE_BLOCK_RE = re.compile(r"</(?:span|div)\s*>", re.I)
+_NUMBER_RE = re.compile(r"\d[\d \u00a0\u202f]*")
+_CURRENCIES = {"₽": "RUR", "руб": "RUR", "$": "USD", "€": "EUR", "₸": "KZT", "br": "BYR", "сум": "UZS"}
+
+
+def parse_search_page(html) -> tuple:
+    """
+    Один проход по странице поиска: (множество ID, {id: карточка}).
+    Множество ID совпадает с extract_ids_regex(); карточка - словарь с ключами
+    id, title, company, salary_from, salary_to, currency, area, published_at
+    (чего нет на странице - None).
+    """
+    if isinstance(html, (bytes, bytearray)):
+        html = html.decode("utf-8", "replace")
+
+    ids = set()
+    records = {}
+    state = None
+    current = None  # карточка, к которой относятся следующие поля (по порядку в документе)
+    for token in _PAGE_TOKEN_RE.finditer(html):
+        attrs = token.group(1) or token.group(2)
+        if attrs is None:
+            if token.group("template") is not None:
+                end = html.find("</template>", token.end())
+                state = _load_state(html[token.end():end if end >= 0 else None])
+            continue  # <script>, <style>, комментарий
+
+        qa = _DATA_QA_RE.search(attrs)
+        field = _CARD_QA.get(qa.group(1)) if qa else None
+
+        if token.group(1) is not None:
+            href = _HREF_RE.search(attrs)
+            m = VACANCY_HREF_RE.search(href.group(1) or href.group(2) or href.group(3) or "") if href else None
+            if m:
+                ids.add(m.group(1))
+                if field == "title":
+                    current = records.setdefault(m.group(1), _empty_record(m.group(1)))
+        if field is None or current is None:
+            continue
+
+        text = _inner_text(html, token.end(), "a" if token.group(1) is not None else None)
+        if field == "salary":
+            current["salary_from"], current["salary_to"], current["currency"] = _parse_salary(text)
+        else:
+            current[field] = text
+
+    if state is not None:
+        for record in _records_from_state(state):
+            # Состояние страницы точнее разметки: его значения важнее, разметка заполняет пропуски
+            merged = records.setdefault(record["id"], _empty_record(record["id"]))
+            merged.update({k: v for k, v in record.items() if v is not None})
+    return ids, {vid: rec for vid, rec in records.items() if vid in ids}
+
+
+def _empty_record(vacancy_id: str) -> dict:
+    return {"id": vacancy_id, "title": None, "company": None, "salary_from": None, "salary_to": None,
+            "currency": None, "area": None, "published_at": None}
+
+
+def _inner_text(html: str, start: int, tag: str = None) -> str:
+    """Текст элемента от конца открывающего тега до закрывающего (вложенные теги выбрасываются)"""
+    # span/div: до первого закрывающего тега блока - карточки hh.ru не вкладывают их в эти поля
+    m = (_CLOSE_A_RE if tag == "a" else _CLOSE_BLOCK_RE).search(html, start)
+    raw = html[start:m.start() if m else start]
+    return " ".join(html_lib.unescape(_TAG_RE.sub(" ", raw)).split()) or None
+
+
+def _parse_salary(text: str) -> tuple:
+    """'100 000 – 200 000 ₽' / 'от 100 000 ₽' / 'до 200 000 ₽' -> (от, до, валюта)"""
+    if not text:
+        return None, None, None
+    numbers = [int(re.sub(r"\D", "", n)) for n in _NUMBER_RE.findall(text)]
+    low = text.lower()
+    currency = next((code for mark, code in _CURRENCIES.items() if mark in low), None)
+    if len(numbers) >= 2:
+        return numbers[0], numbers[1], currency
+    if len(numbers) == 1:
+        if low.lstrip().startswith("до"):
+            return None, numbers[0], currency
+        return numbers[0], None, currency
+    return None, None, currency
+
+
+def _load_state(text: str):
+    text = text.strip()
+    if not text:
+        return None
+    for candidate in (text, html_lib.unescape(text)):
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    return None
+
+
+def _records_from_state(state) -> list:
+    """Карточки из vacancySearchResult.vacancies встроенного состояния (формат как у shortVacancy)"""
+    vacancies = glom(state, "vacancySearchResult.vacancies", default=None)
+    if not isinstance(vacancies, list):
+        return []
+    records = []
+    for v in vacancies:
+        if not isinstance(v, dict) or v.get("vacancyId") is None:
+            continue
+        published = glom(v, "publicationTime.$", default=None)
+        if published is None and isinstance(v.get("publicationTime"), str):
+            published = v["publicationTime"]
+        records.append({
+            "id": str(v["vacancyId"]),
+            "title": v.get("name"),
+            "company": glom(v, "company.name", default=None),
+            "salary_from": glom(v, "compensation.from", default=None),
+            "salary_to": glom(v, "compensation.to", default=None),
+            "currency": glom(v, "compensation.currencyCode", default=None),
+            "area": glom(v, "area.name", default=None),
+            "published_at": published,
+        })
+    return records
+
+
+def extract_ids_bs4(html) -> set:
+    soup = BeautifulSoup(html, "html.parser")
+    ids = set()
+    for link in soup.find_all("a", href=VACANCY_HREF_RE):
+        m = VACANCY_HREF_RE.search(link["href"])
+        if m:
+            ids.add(m.group(1))
+    return ids
+
+
+def extract_ids_lxml(html) -> set:
+    if not html:
+        return set()
+    ids = set()
+    for href in lxml.html.fromstring(html).xpath("//a/@href"):
+        m = VACANCY_HREF_RE.search(href)
+        if m:
+            ids.add(m.group(1))
+    return ids
+
+
+def extract_ids_selectolax(html) -> set:
+    ids = set()
+    for node in HTMLParser(html).css("a[href]"):
+        m = VACANCY_HREF_RE.search(node.attributes.get("href") or "")
+        if m:
+            ids.add(m.group(1))
+    return ids
+
+
+BACKENDS = {
+    "regex": extract_ids_regex,
+    "lxml": extract_ids_lxml if lxml is not None else None,
+    "selectolax": extract_ids_selectolax if HTMLParser is not None else None,
+    "bs4": extract_ids_bs4,
+}
+
+
+def available_backends() -> list:
+    return [name for name, func in BACKENDS.items() if func is not None]
+
+
+def get_extractor(backend: str = "regex"):
+    """Функция извлечения ID; если бэкенд не установлен - regex"""
+    return BACKENDS.get(backend) or extract_ids_regex
+
+
+def extract_ids(html, backend: str = "regex") -> set:
+    """Множество ID вакансий со страницы поиска"""
+    return get_extractor(backend)(html)
@@ -0,0 +1,236 @@
+"""
+Компактный индекс ID вакансий
+=============================
+Отсортированные массивы uint64 вместо множеств строк: ~8 байт на ID.
+Индексы сохраняются в один файл и при старте отображаются в память (mmap),
+поэтому загрузка не строит Python-объектов и занимает миллисекунды.
+
+Формат файла:
+    MAGIC (8 байт) | длина заголовка (uint64) | JSON-заголовок (выровнен до 8) | массивы uint64
+В заголовке: произвольные метаданные и секции {имя: [смещение, количество]}.
+"""
+
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, insort
+from pathlib import Path
+
+MAGIC = b"HHIDX001"
+
+# Сколько добавлений держать в отдельном массиве до слияния с основным
+DELTA_LIMIT = 4096
+
+
+class IdIndex:
+    """Множество числовых ID: основной отсортированный массив + небольшой массив добавлений"""
+
+    def __init__(self, base=None):
+        self._base = base if base is not None else array("Q")
+        self._delta = array("Q")
+
+    def __len__(self) -> int:
+        return len(self._base) + len(self._delta)
+
+    def __contains__(self, vacancy_id) -> bool:
+        key = _as_key(vacancy_id)
+        if key is None:
+            return False
+        return _has(self._base, key) or _has(self._delta, key)
+
+    def __iter__(self):
+        return heapq.merge(self._base, self._delta)
+
+    def add(self, vacancy_id) -> bool:
+        """Добавить ID. False, если он уже был (или не числовой)"""
+        key = _as_key(vacancy_id)
+        if key is None or key in self:
+            return False
+        insort(self._delta, key)
+        if len(self._delta) >= DELTA_LIMIT:
+            self.compact()
+        return True
+
+    def update(self, vacancy_ids):
+        """Добавить много ID разом: одна сортировка и одно слияние вместо вставок по одному"""
+        keys = sorted({key for key in map(_as_key, vacancy_ids) if key is not None})
+        if len(keys) < DELTA_LIMIT:
+            for key in keys:
+                self.add(key)
+            return
+        self.compact()
+        self._base = _merge(self._base, keys)
+
+    def compact(self):
+        """Слить добавления в основной массив (основной перестаёт ссылаться на mmap)"""
+        if self._delta:
+            self._base = _merge(self._base, self._delta)
+            self._delta = array("Q")
+
+    def release(self):
+        """Отпустить ссылку на mmap, скопировав данные в память"""
+        if isinstance(self._base, memoryview):
+            base = array("Q")
+            _extend(base, self._base)
+            self._base = base
+
+
+def _as_key(vacancy_id):
+    if isinstance(vacancy_id, int):
+        return vacancy_id
+    if isinstance(vacancy_id, str) and vacancy_id.isdigit():
+        return int(vacancy_id)
+    return None
+
+
+def _merge(base, keys) -> array:
+    """Слить отсортированные keys в отсортированный base, пропуская дубликаты"""
+    merged = array("Q")
+    start = 0
+    for key in keys:
+        pos = bisect_left(base, key, start)
+        _extend(merged, base[start:pos])
+        start = pos
+        if pos < len(base) and base[pos] == key:
+            continue
+        if merged and merged[-1] == key:
+            continue
+        merged.append(key)
+    _extend(merged, base[start:])
+    return merged
+
+
+def _extend(dst: array, src):
+    """Дописать массив или memoryview формата Q одним копированием"""
+    if isinstance(src, memoryview):
+        dst.frombytes(src.cast("B"))
+    else:
+        dst.extend(src)
+
+
+def _has(arr, key: int) -> bool:
+    i = bisect_left(arr, key)
+    return i < len(arr) and arr[i] == key
+
+
+class IndexFile:
+    """Набор именованных IdIndex, сохраняемый в один файл и открываемый через mmap"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta = {}
+        self.sections = {}  # имя -> IdIndex
+        self._mmap = None
+        self._views = []
+
+    def load(self) -> bool:
+        """Отобразить файл в память. False, если файла нет или он повреждён"""
+        self.close()
+        mapped = self._map()
+        if mapped is None:
+            return False
+        self.meta, views = mapped
+        self.sections = {name: IdIndex(view) for name, view in views.items()}
+        return True
+
+    def save(self, meta: dict = None):
+        """
+        Атомарно записать все секции на диск и заново отобразить файл в память.
+        Снимок - best-effort: если файл занят (на Windows его может держать отображённым
+        другой процесс), поднимается OSError, а индекс остаётся в памяти и догрузится из базы.
+        """
+        if meta is not None:
+            self.meta = meta
+        for index in self.sections.values():
+            index.compact()
+            index.release()
+        self.close(keep_sections=True)
+
+        names = list(self.sections)
+        # Заголовок зависит от смещений, а смещения - от длины заголовка: считаем с запасом
+        header_len = len(json.dumps({"meta": self.meta, "sections": {
+            name: [2 ** 63, 2 ** 63] for name in names
+        }}, ensure_ascii=False).encode("utf-8"))
+        header_len += -header_len % 8
+        offsets = {}
+        offset = 16 + header_len
+        for name in names:
+            offsets[name] = [offset, len(self.sections[name])]
+            offset += len(self.sections[name]) * 8
+        header = json.dumps({"meta": self.meta, "sections": offsets}, ensure_ascii=False).encode("utf-8")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(MAGIC)
+                f.write(struct.pack("<Q", header_len))
+                f.write(header.ljust(header_len, b" "))
+                for name in names:
+                    data = self.sections[name]._base
+                    if sys.byteorder != "little":
+                        data = array("Q", data)
+                        data.byteswap()
+                    f.write(data)
+            os.replace(tmp, self.path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+        # Подменяем массивы в памяти отображением только что записанного файла
+        mapped = self._map()
+        if mapped is not None:
+            for name, view in mapped[1].items():
+                if name in self.sections and not self.sections[name]._delta:
+                    self.sections[name]._base = view
+
+    def _map(self):
+        """(meta, {имя: memoryview}) для файла на диске или None"""
+        try:
+            with open(self.path, "rb") as f:
+                if f.read(8) != MAGIC:
+                    return None
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        views = {}
+        try:
+            (header_len,) = struct.unpack_from("<Q", mm, 8)
+            header = json.loads(mm[16:16 + header_len].decode("utf-8"))
+            for name, (offset, count) in header["sections"].items():
+                if sys.byteorder == "little":
+                    view = memoryview(mm)[offset:offset + count * 8].cast("Q")
+                    self._views.append(view)
+                else:
+                    view = array("Q", mm[offset:offset + count * 8])
+                    view.byteswap()
+                views[name] = view
+        except (ValueError, KeyError, TypeError, struct.error):
+            self._mmap = mm
+            self.close(keep_sections=True)
+            return None
+
+        self._mmap = mm
+        return header.get("meta", {}), views
+
+    def close(self, keep_sections: bool = False):
+        """Закрыть отображение. keep_sections - оставить секции, скопировав их в память"""
+        if keep_sections:
+            for index in self.sections.values():
+                index.release()
+        else:
+            self.sections = {}
+        for view in self._views:
+            view.release()
+        self._views = []
+        mm, self._mmap = self._mmap, None
+        if mm is not None:
+            mm.close()
@@ -0,0 +1,91 @@
+"""
+Поиск ключевых слов
+===================
+KeywordMatcher собирает список слов (сотни стоп-слов, названий работодателей) в одно
+регулярное выражение, сжатое в префиксное дерево: "qa|qa engineer|qml" -> "q(?:a(?: engineer)?|ml)".
+Строка проверяется одним проходом, без цикла по словам; scan() проверяет сразу пачку строк
+(все названия и компании цикла) одним проходом по склеенному тексту.
+
+Сопоставление без учёта регистра, по подстроке (как "слово in title").
+Матчер строится один раз при загрузке настроек и дальше только читается.
+"""
+
+import re
+
+
+class KeywordMatcher:
+    """Набор ключевых слов, проверяемый одним скомпилированным выражением"""
+
+    def __init__(self, words=()):
+        self.words = sorted({word.casefold() for word in words if word and word.strip()})
+        self._re = re.compile(_trie_pattern(self.words)) if self.words else None
+
+    def __bool__(self) -> bool:
+        return self._re is not None
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def search(self, text: str):
+        """Первое найденное слово или None"""
+        if self._re is None or not text:
+            return None
+        m = self._re.search(text.casefold())
+        return m.group(0) if m else None
+
+    def matches(self, text: str) -> bool:
+        return self.search(text) is not None
+
+    def scan(self, texts: dict) -> dict:
+        """
+        Проверить много строк одним проходом.
+        texts: {ключ: строка}. Возвращает {ключ: первое найденное слово} для строк с совпадением.
+        """
+        if self._re is None:
+            return {}
+        keys = []
+        parts = []
+        for key, text in texts.items():
+            if text:
+                keys.append(key)
+                parts.append(text.casefold())
+        if not parts:
+            return {}
+        # Строки склеиваются через \n (слова его не содержат, совпадение не перейдёт через границу)
+        joined = "\n".join(parts)
+        starts = []
+        pos = 0
+        for part in parts:
+            starts.append(pos)
+            pos += len(part) + 1
+
+        found = {}
+        idx = 0
+        for m in self._re.finditer(joined):
+            while idx + 1 < len(starts) and starts[idx + 1] <= m.start():
+                idx += 1
+            found.setdefault(keys[idx], m.group(0))
+        return found
+
+
+def _trie_pattern(words) -> str:
+    """Регулярное выражение из префиксного дерева слов"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word.replace("\n", " "):
+            node = node.setdefault(char, {})
+        node[""] = {}  # конец слова
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: dict) -> str:
+    # Короткое слово - префикс длинного: длинное пробуем первым, короткое делаем необязательным хвостом
+    optional = "" in node
+    branches = [re.escape(char) + _node_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    if len(branches) == 1 and not optional:
+        return branches[0]
+    group = "(?:" + "|".join(branches) + ")"
+    return group + "?" if optional else group
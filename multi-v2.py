@@ -6,16 +6,15 @@ HH.RU Auto Response Bot - Ultimate TUI Edition v2
 
 import asyncio
 import aiohttp
-import ssl
 from bs4 import BeautifulSoup
 import re
 import random
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from glom import glom
 import json
 from pathlib import Path
-import requests
-from collections import deque
+from collections import deque, Counter
 import urllib.parse
 import time
 import threading
@@ -33,6 +32,15 @@ from rich.panel import Panel
 from rich.table import Table
 from rich import box
 
+from hh_http import AccountSession, form_data
+from hh_parse import extract_ids, parse_search_page
+from rate_limit import TokenBucket, RateLimiter, AimdPacer
+from vacancy_filter import VacancyFilter
+from send_queue import SendQueue
+from page_cache import PageCache
+from debug_log import log_debug, debug_enabled, debug_dropped, setup_debug_log, set_debug_level, LEVELS, INFO, WARNING
+from storage import VacancyStore
+
 # ============================================================
 # ХРАНИЛИЩЕ ДАННЫХ
 # ============================================================
@@ -40,124 +48,50 @@ from rich import box
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
 
+DB_FILE = DATA_DIR / "vacancies.db"
+# Старые JSON-хранилища: импортируются в DB_FILE при первом запуске
 APPLIED_FILE = DATA_DIR / "applied_vacancies.json"
 TEST_REQUIRED_FILE = DATA_DIR / "test_required_vacancies.json"
 DEBUG_LOG_FILE = DATA_DIR / "debug.log"
 
 
-def log_debug(message: str):
-    """Записать отладочное сообщение в файл"""
-    with open(DEBUG_LOG_FILE, "a", encoding="utf-8") as f:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        f.write(f"[{timestamp}] {message}\n")
-
-
-def load_json(filepath: Path) -> dict:
-    if filepath.exists():
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
-
-
-def save_json(filepath: Path, data: dict):
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+STORE = VacancyStore(DB_FILE)
+STORE.import_json(APPLIED_FILE, TEST_REQUIRED_FILE)
 
 
 def add_applied(account_name: str, vacancy_id: str, info: dict = None):
-    data = load_json(APPLIED_FILE)
-    if account_name not in data:
-        data[account_name] = {}
-    data[account_name][vacancy_id] = {
-        "url": f"https://hh.ru/vacancy/{vacancy_id}",
-        "title": (info or {}).get("title", ""),
-        "company": (info or {}).get("company", ""),
-        "salary_from": (info or {}).get("salary_from"),
-        "salary_to": (info or {}).get("salary_to"),
-        "at": datetime.now().isoformat()
-    }
-    save_json(APPLIED_FILE, data)
+    STORE.add_applied(account_name, vacancy_id, info)
 
 
 def add_test_vacancy(vacancy_id: str, title: str = "", company: str = ""):
-    data = load_json(TEST_REQUIRED_FILE)
-    if vacancy_id not in data:
-        data[vacancy_id] = {
-            "url": f"https://hh.ru/vacancy/{vacancy_id}",
-            "title": title,
-            "company": company,
-            "at": datetime.now().isoformat()
-        }
-        save_json(TEST_REQUIRED_FILE, data)
+    STORE.add_test(vacancy_id, title, company)
 
 
 def is_applied(account_name: str, vacancy_id: str) -> bool:
-    return vacancy_id in load_json(APPLIED_FILE).get(account_name, {})
+    return STORE.is_applied(account_name, vacancy_id)
 
 
 def is_test(vacancy_id: str) -> bool:
-    return vacancy_id in load_json(TEST_REQUIRED_FILE)
+    return STORE.is_test(vacancy_id)
+
+
+def partition_vacancies(account_name: str, vacancy_ids) -> tuple:
+    """(новые, уже откликались, с тестом) для всех собранных ID разом"""
+    return STORE.partition(account_name, vacancy_ids)
 
 
 def get_stats() -> dict:
-    applied = load_json(APPLIED_FILE)
-    tests = load_json(TEST_REQUIRED_FILE)
-
-    total = sum(len(v) for v in applied.values())
-    by_acc = {k: len(v) for k, v in applied.items()}
-
-    return {"total": total, "tests": len(tests), "by_acc": by_acc}
-
-
-def get_applied_list(limit: int = 50) -> list:
-    """Получить список последних откликов"""
-    applied = load_json(APPLIED_FILE)
-    all_items = []
-
-    for acc_name, vacancies in applied.items():
-        for vid, info in vacancies.items():
-            all_items.append({
-                "account": acc_name,
-                "vacancy_id": vid,
-                "url": info.get("url", f"https://hh.ru/vacancy/{vid}"),
-                "title": info.get("title", ""),
-                "company": info.get("company", ""),
-                "salary_from": info.get("salary_from"),
-                "salary_to": info.get("salary_to"),
-                "at": info.get("at", "")
-            })
-
-    # Сортируем по дате (новые первые)
-    all_items.sort(key=lambda x: x.get("at", ""), reverse=True)
-    return all_items[:limit]
-
-
-def get_test_list(limit: int = 50) -> list:
-    """Получить список вакансий с тестами"""
-    tests = load_json(TEST_REQUIRED_FILE)
-    items = []
-
-    for vid, info in tests.items():
-        items.append({
-            "vacancy_id": vid,
-            "url": info.get("url", f"https://hh.ru/vacancy/{vid}"),
-            "title": info.get("title", ""),
-            "company": info.get("company", ""),
-            "at": info.get("at", "")
-        })
+    return STORE.get_stats()
 
-    # Сортируем по дате (новые первые)
-    items.sort(key=lambda x: x.get("at", ""), reverse=True)
-    return items[:limit]
-    tests = load_json(TEST_REQUIRED_FILE)
-    return {
-        "total": sum(len(v) for v in applied.values()),
-        "tests": len(tests),
-        "by_acc": {k: len(v) for k, v in applied.items()}
-    }
+
+def get_applied_list(limit: int = 50, before: list = None) -> list:
+    """Получить список последних откликов (before - курсор страницы)"""
+    return STORE.get_applied_list(limit, before)
+
+
+def get_test_list(limit: int = 50, before: list = None) -> list:
+    """Получить список вакансий с тестами (before - курсор страницы)"""
+    return STORE.get_test_list(limit, before)
 
 
 # ============================================================
@@ -182,6 +116,7 @@ accounts_data = [
             "https://hh.ru/search/vacancy?text=QA&area=1&items_on_page=20",
             "https://hh.ru/search/vacancy?text=Tester&area=1&items_on_page=20",
         ],
+        "filters": {},  # Правила отбора вакансий перед откликом, см. vacancy_filter.py
         "cookies": {
             "hhtoken": "<HHTOKEN>",
             "hhul": "<HHUL>",
@@ -206,6 +141,7 @@ accounts_data = [
             "https://hh.ru/search/vacancy?text=QA&area=1&items_on_page=20",
             "https://hh.ru/search/vacancy?text=Technical+Writer&area=1&items_on_page=20",
         ],
+        "filters": {},  # Правила отбора вакансий перед откликом, см. vacancy_filter.py
         "cookies": {
             "hhtoken": "<HHTOKEN>",
             "hhul": "<HHUL>",
@@ -224,15 +160,48 @@ accounts_data = [
 class Config:
     """Глобальные настройки (можно менять в runtime)"""
     pages_per_url = 5  # Страниц с каждого поискового запроса
-    max_concurrent = 5  # Максимум одновременных запросов
-    response_delay = 3  # Задержка между откликами (секунды)
+    max_concurrent = 5  # Максимум одновременных запросов аккаунта при сборе
+    fetch_retries = 3  # Повторов страницы при таймауте, обрыве, 5xx или 429
+    fetch_backoff = 1.0  # Базовая пауза перед повтором (секунды, растёт вдвое с каждой попыткой)
+    fetch_backoff_max = 30  # Максимальная пауза перед повтором (секунды)
+    collect_deadline = 180  # Сколько секунд цикла может занять сбор вместе с повторами
+    incremental_crawl = True  # Листать URL (order_by=publication_time) только пока на страницах есть вакансии новее прошлого сбора
+    full_crawl_interval = 60  # Раз в сколько минут всё равно проходить все страницы (поднятые вакансии)
+    page_cache_ttl = 60  # Сколько секунд страница поиска общая для аккаунтов с тем же URL (0 - выключить)
+    account_rate = 20  # Темп запросов аккаунта, запросов в минуту (сбор и отклики вместе)
+    account_burst = 5  # Сколько запросов аккаунта можно сделать подряд без паузы
+    global_rate = 0  # Общий темп всех аккаунтов с этого IP, запросов в минуту (0 - без ограничения)
+    adaptive_rate = True  # Подстраивать темп аккаунта по ответам hh.ru (account_rate - стартовый)
+    account_rate_min = 5  # Нижняя граница адаптивного темпа (запросов в минуту)
+    account_rate_max = 60  # Верхняя граница адаптивного темпа
+    rate_increase = 0.5  # Прибавка к темпу за каждый чистый ответ
+    rate_decrease = 0.5  # Множитель темпа при 429, таймауте или всплеске ошибок
+    queue_salary_bonus = 24  # Очередь откликов: сколько часов свежести стоит подходящая зарплата
+    queue_rank_penalty = 1  # Очередь откликов: сколько часов свежести стоит позиция в выдаче (URL/страница)
+    queue_max_age = 0  # Выбрасывать из очереди откликов вакансии старше стольких часов (0 - не выбрасывать)
     pause_between_cycles = 120  # Пауза между циклами (секунды)
     limit_check_interval = 30  # Интервал проверки лимита (минуты)
     resume_touch_interval = 4  # Интервал поднятия резюме (часы)
+    debug_log_level = "INFO"  # Уровень data/debug.log: DEBUG пишет HTML и ответы целиком
+    debug_log_max_mb = 10  # Размер debug.log до ротации (МБ)
+    debug_log_backups = 5  # Сколько сжатых частей лога хранить
+    id_parser = "regex"  # Разбор страниц поиска: regex, lxml, selectolax или bs4 (см. hh_parse.py)
+    debug_sample_rate = 1.0  # Доля страниц с подробной диагностикой парсинга при уровне DEBUG
+    http_pool_limit = 10  # Максимум соединений в пуле аккаунта
+    http_dns_cache_ttl = 300  # Кэш DNS (секунды)
+    http_keepalive = 30  # Сколько держать простаивающее соединение (секунды)
 
 
 CONFIG = Config()
 
+setup_debug_log(DEBUG_LOG_FILE, CONFIG.debug_log_level, CONFIG.debug_log_max_mb, CONFIG.debug_log_backups)
+
+# Общее ведро на IP: его делят воркеры всех аккаунтов
+GLOBAL_BUCKET = TokenBucket(CONFIG.global_rate, CONFIG.account_burst) if CONFIG.global_rate > 0 else None
+
+# Общий кэш страниц поиска: одинаковые URL разных аккаунтов скачиваются один раз
+PAGE_CACHE = PageCache(CONFIG.page_cache_ttl)
+
 
 # ============================================================
 # API ФУНКЦИИ
@@ -246,26 +215,62 @@ def get_headers(xsrf: str) -> dict:
     }
 
 
-def parse_ids(html: str) -> set:
-    soup = BeautifulSoup(html, "html.parser")
-    ids = set()
-    for link in soup.find_all("a", href=re.compile(r"/vacancy/\d+")):
-        m = re.search(r"/vacancy/(\d+)", link["href"])
-        if m:
-            ids.add(m.group(1))
+def diagnostics_enabled() -> bool:
+    """
+    Нужна ли подробная диагностика для текущей страницы: только при уровне лога DEBUG
+    и с вероятностью CONFIG.debug_sample_rate (чтобы не разбирать каждую страницу повторно)
+    """
+    if not debug_enabled():
+        return False
+    return CONFIG.debug_sample_rate >= 1 or random.random() < CONFIG.debug_sample_rate
+
 
-    # Логируем результат парсинга
-    log_debug(f"🔍 Парсинг: найдено {len(ids)} вакансий")
-    if len(ids) > 0:
-        log_debug(f"   ID: {', '.join(list(ids)[:5])}{'...' if len(ids) > 5 else ''}")
+def parse_page(html: str) -> tuple:
+    """(множество ID, {id: карточка вакансии}) со страницы поиска - одним проходом"""
+    if CONFIG.id_parser == "regex":
+        ids, records = parse_search_page(html)
     else:
-        # Если ничего не найдено, логируем структуру страницы
-        log_debug(f"   ⚠️ Вакансии не найдены!")
-        log_debug(f"   Всего ссылок <a>: {len(soup.find_all('a'))}")
-        log_debug(f"   Ссылок с /vacancy/: {len([a for a in soup.find_all('a') if a.get('href') and '/vacancy/' in str(a.get('href'))])}")
-    log_debug("")
+        # Другие бэкенды дают только ID
+        ids, records = extract_ids(html, CONFIG.id_parser), {}
+
+    # Логируем результат парсинга (повторные проходы по документу - только в режиме диагностики)
+    if diagnostics_enabled():
+        log_debug(f"🔍 Парсинг: найдено {len(ids)} вакансий")
+        if len(ids) > 0:
+            log_debug(f"   ID: {', '.join(list(ids)[:5])}{'...' if len(ids) > 5 else ''}")
+        else:
+            # Если ничего не найдено, логируем структуру страницы
+            anchors = BeautifulSoup(html, "html.parser").find_all("a")
+            log_debug(f"   ⚠️ Вакансии не найдены!")
+            log_debug(f"   Всего ссылок <a>: {len(anchors)}")
+            log_debug(f"   Ссылок с /vacancy/: {sum(1 for a in anchors if '/vacancy/' in str(a.get('href') or ''))}")
+        log_debug("")
+
+    return ids, records
+
+
+def merge_vacancy_info(card: dict, info: dict) -> dict:
+    """Данные из ответа на отклик, дополненные карточкой со страницы поиска"""
+    merged = dict(info or {})
+    for key in ("title", "company", "salary_from", "salary_to"):
+        if merged.get(key) in (None, "", "?") and card.get(key) is not None:
+            merged[key] = card[key]
+    return merged
+
+
+FILTER_RULE_LABELS = {
+    "salary": "зарплата",
+    "title_include": "не по теме",
+    "title_exclude": "стоп-слово",
+    "employer": "работодатель",
+    "area": "город",
+    "stale": "устарела",
+}
+
 
-    return ids
+def format_rejected(rejected: Counter) -> str:
+    """'зарплата 5 · стоп-слово 2' - сколько вакансий отсекло каждое правило фильтра"""
+    return " · ".join(f"{FILTER_RULE_LABELS.get(rule, rule)} {n}" for rule, n in rejected.most_common())
 
 
 def extract_search_query(url: str) -> str:
@@ -279,94 +284,175 @@ def extract_search_query(url: str) -> str:
     return "Поиск"
 
 
-async def fetch_page(session, url, sem):
-    async with sem:
+def sorted_by_date(url: str) -> bool:
+    """Выдача отсортирована по дате публикации: только тогда новые вакансии - на первых страницах"""
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+    return "publication_time" in query.get("order_by", [])
+
+
+class RetryableFetchError(Exception):
+    """Временная ошибка загрузки страницы (5xx, 429): имеет смысл повторить"""
+
+    def __init__(self, reason: str, retry_after: float = None):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class PermanentFetchError(Exception):
+    """Ошибка, которую повтор не исправит (4xx, редирект на авторизацию)"""
+
+
+# Сетевые ошибки, после которых запрос повторяется
+RETRYABLE_EXCEPTIONS = (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)
+
+
+def parse_retry_after(value: str):
+    """Retry-After в секундах (число или HTTP-дата) или None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+async def _get_page(session, url) -> str:
+    """Одна попытка загрузки; неудачу сообщает исключением с классом ошибки"""
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as r:
+        html = await r.text()
+
+        # Логируем результат
+        if debug_enabled():
+            log_debug(f"✅ URL: {url}")
+            log_debug(f"   Статус: {r.status}")
+            log_debug(f"   Размер: {len(html)} байт")
+            log_debug(f"   Начало HTML: {html[:500]}")
+            log_debug("")
+
+        if r.status == 429:
+            raise RetryableFetchError("HTTP 429", parse_retry_after(r.headers.get("Retry-After")))
+        if r.status >= 500:
+            raise RetryableFetchError(f"HTTP {r.status}")
+        if r.status >= 400:
+            raise PermanentFetchError(f"HTTP {r.status}")
+        if "/account/login" in r.url.path:
+            raise PermanentFetchError("редирект на авторизацию")
+        return html
+
+
+async def fetch_page(session, url, sem, deadline: float = None, on_retry=None) -> str:
+    """
+    Загрузить страницу с повторами временных ошибок (таймауты, обрывы, 5xx, 429).
+    Пауза между попытками растёт экспоненциально со случайным разбросом, Retry-After учитывается.
+    Постоянные ошибки (4xx, авторизация) не повторяются.
+
+    :param deadline: time.monotonic(), после которого повторы не начинаются
+    :param on_retry: Вызывается перед каждым повтором
+    :return: HTML или "" при неудаче
+    """
+    attempt = 0
+    while True:
         try:
-            await asyncio.sleep(0.2)
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as r:
-                html = await r.text()
-
-                # Логируем результат
-                log_debug(f"✅ URL: {url}")
-                log_debug(f"   Статус: {r.status}")
-                log_debug(f"   Размер: {len(html)} байт")
-                log_debug(f"   Начало HTML: {html[:500]}")
-                log_debug("")
-
-                return html
+            async with sem:
+                return await _get_page(session, url)
+        except RETRYABLE_EXCEPTIONS as e:
+            reason, retry_after = type(e).__name__, None
+        except RetryableFetchError as e:
+            reason, retry_after = str(e), e.retry_after
         except Exception as e:
             # Логируем ошибку
-            log_debug(f"❌ ОШИБКА при загрузке: {url}")
-            log_debug(f"   Тип ошибки: {type(e).__name__}")
-            log_debug(f"   Сообщение: {str(e)}")
+            log_debug(f"❌ ОШИБКА при загрузке: {url}", WARNING)
+            log_debug(f"   Тип ошибки: {type(e).__name__}", WARNING)
+            log_debug(f"   Сообщение: {str(e)}", WARNING)
+            log_debug("")
+            return ""
+
+        attempt += 1
+        # Full jitter: случайная пауза до base * 2^attempt, но не меньше Retry-After
+        delay = random.uniform(0, min(CONFIG.fetch_backoff_max, CONFIG.fetch_backoff * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if attempt > CONFIG.fetch_retries or (deadline is not None and time.monotonic() + delay > deadline):
+            log_debug(f"❌ ОШИБКА при загрузке: {url}", WARNING)
+            log_debug(f"   {reason}, попыток: {attempt}", WARNING)
             log_debug("")
             return ""
 
+        log_debug(f"🔁 Повтор {attempt} через {delay:.1f}с ({reason}): {url}", INFO)
+        if on_retry is not None:
+            on_retry()
+        await asyncio.sleep(delay)
+
 
-def send_response(acc: dict, vid: str) -> tuple:
-    """Возвращает (результат, инфо)"""
-    log_debug(f"📤 ОТПРАВКА ОТКЛИКА на вакансию {vid}")
-    log_debug(f"   Аккаунт: {acc['name']}")
+async def send_response(session, acc: dict, vid: str) -> tuple:
+    """Возвращает (результат, инфо). Запрос идёт через общую сессию аккаунта"""
+    log_debug(f"📤 ОТПРАВКА ОТКЛИКА на вакансию {vid}", INFO)
+    log_debug(f"   Аккаунт: {acc['name']}", INFO)
 
-    headers = get_headers(acc["cookies"]["_xsrf"])
-    files = {
-        "resume_hash": (None, acc["resume_hash"]),
-        "vacancy_id": (None, vid),
-        "letterRequired": (None, "true"),
-        "letter": (None, acc["letter"]),
-        "lux": (None, "true"),
-        "ignore_postponed": (None, "true"),
+    fields = {
+        "resume_hash": acc["resume_hash"],
+        "vacancy_id": vid,
+        "letterRequired": "true",
+        "letter": acc["letter"],
+        "lux": "true",
+        "ignore_postponed": "true",
     }
 
     try:
-        r = requests.post(
+        async with session.post(
             "https://hh.ru/applicant/vacancy_response/popup",
-            headers=headers, cookies=acc["cookies"], files=files, timeout=15
-        )
-        txt = r.text
+            data=form_data(fields), timeout=aiohttp.ClientTimeout(total=15)
+        ) as r:
+            status = r.status
+            txt = await r.text()
 
-        log_debug(f"   Ответ HTTP: {r.status_code}")
-        log_debug(f"   Размер ответа: {len(txt)} байт")
-        log_debug(f"   Начало ответа: {txt[:300]}")
+        if debug_enabled():
+            log_debug(f"   Ответ HTTP: {status}")
+            log_debug(f"   Размер ответа: {len(txt)} байт")
+            log_debug(f"   Начало ответа: {txt[:300]}")
 
         # СНАЧАЛА проверяем успешные отклики (статус 200)
-        if r.status_code == 200:
+        if status == 200:
             # Вариант 1: есть shortVacancy (стандартный успех)
             if "shortVacancy" in txt:
                 try:
-                    p = r.json()
+                    p = json.loads(txt)
                     info = {
                         "title": glom(p, "responseStatus.shortVacancy.name", default="?"),
                         "company": glom(p, "responseStatus.shortVacancy.company.name", default="?"),
                         "salary_from": glom(p, "responseStatus.shortVacancy.compensation.from", default=None),
                         "salary_to": glom(p, "responseStatus.shortVacancy.compensation.to", default=None),
                     }
-                    log_debug(f"   ✅ РЕЗУЛЬТАТ: УСПЕШНО (с данными)")
-                    log_debug(f"   Вакансия: {info.get('title', '?')}")
-                    log_debug(f"   Компания: {info.get('company', '?')}")
-                    log_debug("")
+                    log_debug(f"   ✅ РЕЗУЛЬТАТ: УСПЕШНО (с данными)", INFO)
+                    log_debug(f"   Вакансия: {info.get('title', '?')}", INFO)
+                    log_debug(f"   Компания: {info.get('company', '?')}", INFO)
+                    log_debug("", INFO)
                     return "sent", info
                 except Exception as e:
-                    log_debug(f"   ✅ РЕЗУЛЬТАТ: УСПЕШНО (ошибка парсинга: {e})")
-                    log_debug("")
+                    log_debug(f"   ✅ РЕЗУЛЬТАТ: УСПЕШНО (ошибка парсинга: {e})", INFO)
+                    log_debug("", INFO)
                     return "sent", {}
 
             # Вариант 2: успешный ответ без shortVacancy (некоторые вакансии)
             if '"success":true' in txt or '"status":"ok"' in txt or '"responded":true' in txt:
-                log_debug(f"   ✅ РЕЗУЛЬТАТ: УСПЕШНО (по маркеру)")
-                log_debug("")
+                log_debug(f"   ✅ РЕЗУЛЬТАТ: УСПЕШНО (по маркеру)", INFO)
+                log_debug("", INFO)
                 return "sent", {}
 
             # Вариант 3: если статус 200 и нет явных ошибок, считаем это успехом
             # (некоторые вакансии возвращают успех без явных маркеров)
-            log_debug(f"   ✅ РЕЗУЛЬТАТ: УСПЕШНО (предполагаемый)")
-            log_debug("")
+            log_debug(f"   ✅ РЕЗУЛЬТАТ: УСПЕШНО (предполагаемый)", INFO)
+            log_debug("", INFO)
             return "sent", {}
 
         # Теперь проверяем ошибки (только если статус НЕ 200)
         if "negotiations-limit-exceeded" in txt:
-            log_debug(f"   ❌ РЕЗУЛЬТАТ: ЛИМИТ ИСЧЕРПАН")
-            log_debug("")
+            log_debug(f"   ❌ РЕЗУЛЬТАТ: ЛИМИТ ИСЧЕРПАН", INFO)
+            log_debug("", INFO)
             return "limit", {}
 
         if "test-required" in txt:
@@ -374,80 +460,76 @@ def send_response(acc: dict, vid: str) -> tuple:
             info = {}
             if "shortVacancy" in txt:
                 try:
-                    p = r.json()
+                    p = json.loads(txt)
                     info = {
                         "title": glom(p, "responseStatus.shortVacancy.name", default=""),
                         "company": glom(p, "responseStatus.shortVacancy.company.name", default=""),
                     }
                 except:
                     pass
-            log_debug(f"   🧪 РЕЗУЛЬТАТ: ТЕСТ ТРЕБУЕТСЯ")
-            log_debug(f"   Вакансия: {info.get('title', 'неизвестно')}")
-            log_debug("")
+            log_debug(f"   🧪 РЕЗУЛЬТАТ: ТЕСТ ТРЕБУЕТСЯ", INFO)
+            log_debug(f"   Вакансия: {info.get('title', 'неизвестно')}", INFO)
+            log_debug("", INFO)
             return "test", info
 
         if "alreadyApplied" in txt:
-            log_debug(f"   🔄 РЕЗУЛЬТАТ: УЖЕ ОТКЛИКНУЛИСЬ")
-            log_debug("")
+            log_debug(f"   🔄 РЕЗУЛЬТАТ: УЖЕ ОТКЛИКНУЛИСЬ", INFO)
+            log_debug("", INFO)
             return "already", {}
 
-        log_debug(f"   ❌ РЕЗУЛЬТАТ: ОШИБКА (статус {r.status_code})")
-        log_debug(f"   Ответ: {txt[:200]}")
-        log_debug("")
+        log_debug(f"   ❌ РЕЗУЛЬТАТ: ОШИБКА (статус {status})", WARNING)
+        log_debug(f"   Ответ: {txt[:200]}", WARNING)
+        log_debug("", INFO)
         return "error", {"raw": txt[:200]}  # Возвращаем часть ответа для отладки
     except Exception as e:
-        log_debug(f"   ❌ РЕЗУЛЬТАТ: ИСКЛЮЧЕНИЕ")
-        log_debug(f"   Тип: {type(e).__name__}")
-        log_debug(f"   Сообщение: {str(e)}")
-        log_debug("")
+        log_debug(f"   ❌ РЕЗУЛЬТАТ: ИСКЛЮЧЕНИЕ", WARNING)
+        log_debug(f"   Тип: {type(e).__name__}", WARNING)
+        log_debug(f"   Сообщение: {str(e)}", WARNING)
+        log_debug("", INFO)
         return "error", {"exception": str(e)}
 
 
-def check_limit(acc: dict) -> bool:
+async def check_limit(session, acc: dict) -> bool:
     """True если лимит активен"""
-    headers = get_headers(acc["cookies"]["_xsrf"])
     try:
-        r = requests.post(
+        async with session.post(
             "https://hh.ru/applicant/vacancy_response/popup",
-            headers=headers, cookies=acc["cookies"],
-            files={"resume_hash": (None, acc["resume_hash"]), "vacancy_id": (None, "1")},
-            timeout=10
-        )
-        return "negotiations-limit-exceeded" in r.text
+            data=form_data({"resume_hash": acc["resume_hash"], "vacancy_id": "1"}),
+            timeout=aiohttp.ClientTimeout(total=10)
+        ) as r:
+            return "negotiations-limit-exceeded" in await r.text()
     except:
         return True
 
 
-def touch_resume(acc: dict) -> tuple:
+async def touch_resume(session, acc: dict) -> tuple:
     """
     Поднять резюме в поиске.
     Возвращает (success: bool, message: str)
     """
-    headers = get_headers(acc["cookies"]["_xsrf"])
     resume_hash = acc["resume_hash"]
 
     url_touch = "https://hh.ru/applicant/resumes/touch"
 
-    touch_files = {
-        "resume": (None, resume_hash),
-        "undirectable": (None, "true")
+    touch_fields = {
+        "resume": resume_hash,
+        "undirectable": "true"
     }
 
     try:
-        response = requests.post(
+        async with session.post(
             url_touch,
-            headers=headers,
-            cookies=acc["cookies"],
-            files=touch_files,
-            timeout=10
-        )
+            data=form_data(touch_fields),
+            timeout=aiohttp.ClientTimeout(total=10)
+        ) as response:
+            status = response.status
 
-        if response.status_code == 200:
+        if status == 200:
             return True, "Резюме поднято!"
-        elif response.status_code == 429:
+        elif status == 429:
             return False, "Слишком часто (429)"
         else:
-            return False, f"HTTP {response.status_code}"
+            return False, f"HTTP {status}"
 
     except Exception as e:
         return False, f"Ошибка: {str(e)[:30]}"
@@ -485,6 +567,7 @@ class AccountState:
         self.total_urls = len(acc_data["urls"])
         self.current_page = 0
         self.total_pages = CONFIG.pages_per_url
+        self.fetch_retries = 0  # Повторов загрузки страниц за текущий цикл
 
         # Текущая вакансия
         self.current_vacancy_id = ""
@@ -496,6 +579,23 @@ class AccountState:
         # Собранные вакансии по URL
         self.vacancies_by_url = {}  # url -> count
         self.vacancies_queue = []
+        self.vacancy_info = {}  # id -> карточка со страницы поиска (см. hh_parse.parse_search_page)
+        self.vacancy_rank = {}  # id -> лучшая позиция в выдаче (номер URL + номер страницы)
+
+        # Фильтр перед откликом и сколько вакансий отсёк каждым правилом за сессию
+        self.vacancy_filter = VacancyFilter(acc_data.get("filters"))
+        self.filter_rejected = Counter()
+
+        # Очередь откликов по приоритету; неотправленное переходит в следующий цикл
+        # и хранится в базе, так что переживает перезапуск
+        self.send_queue = SendQueue(
+            self.vacancy_filter.salary_min, CONFIG.queue_salary_bonus, CONFIG.queue_rank_penalty,
+            CONFIG.queue_max_age,
+        )
+        stale = self.send_queue.restore(STORE.load_queue(self.name))
+        if stale:
+            self.filter_rejected["stale"] += stale
+        self.resume_queue = True  # первый цикл - с сохранённой очереди, если она есть
 
         # Лимит
         self.limit_exceeded = False
@@ -507,6 +607,13 @@ class AccountState:
         self.next_resume_touch = None
         self.resume_touch_status = ""
 
+        # Темп запросов аккаунта (ведро токенов, общее для сбора и откликов)
+        self.rate_bucket = TokenBucket(CONFIG.account_rate, CONFIG.account_burst)
+        self.pacer = AimdPacer(
+            self.rate_bucket, CONFIG.account_rate_min, CONFIG.account_rate_max,
+            increase=CONFIG.rate_increase, decrease=CONFIG.rate_decrease,
+        ) if CONFIG.adaptive_rate else None
+
         # Таймеры
         self.last_action_time = None
         self.cycle_start_time = None
@@ -562,6 +669,8 @@ class DetailedAccountPanel(Static):
             lines.append(f"  Запрос: [cyan]{query}[/cyan]")
             lines.append(f"  URL: [dim]{s.current_url_idx + 1}/{s.total_urls}[/dim]")
             lines.append(f"  Страница: [dim]{s.current_page}/{s.total_pages}[/dim]")
+            if s.fetch_retries:
+                lines.append(f"  Повторов: [yellow]{s.fetch_retries}[/yellow]")
 
             # Прогресс-бар сбора
             if s.total_urls > 0:
@@ -659,6 +768,8 @@ class DetailedAccountPanel(Static):
 
         stats_line = f"  [green]✅ {s.sent}[/green]  [magenta]🧪 {s.tests}[/magenta]  [blue]🔄 {s.already_applied}[/blue]  [red]❌ {s.errors}[/red]"
         lines.append(stats_line)
+        if s.filter_rejected:
+            lines.append(f"  [dim]🚫 Отсеяно:[/dim] {format_rejected(s.filter_rejected)}")
 
         # === ПОСЛЕДНИЕ ДЕЙСТВИЯ ===
         if s.action_history:
@@ -710,7 +821,7 @@ class GlobalStatsPanel(Static):
         elapsed_mins = max(1, elapsed.total_seconds() / 60)
         rate = total_sent / elapsed_mins
 
-        # Загрузка из хранилища
+        # Счётчики хранилища (кэшируются до следующей записи)
         storage_stats = get_stats()
 
         lines = [
@@ -726,6 +837,7 @@ class GlobalStatsPanel(Static):
             "",
             "[bold blue]💾 Всего в базе:[/bold blue]",
             f"  ✉️ Откликов: [blue]{storage_stats['total']}[/blue]",
+            f"  📅 Сегодня: [blue]{storage_stats['today']}[/blue]",
             f"  🧪 Тестовых: [magenta]{storage_stats['tests']}[/magenta]",
         ]
 
@@ -842,25 +954,67 @@ class ActivityLogPanel(Static):
             pass
 
 
-class AppliedVacanciesPanel(Static):
+class PagedListPanel(Static):
+    """Список с постраничной прокруткой по курсору (N - дальше, B - назад)"""
+
+    PAGE_SIZE = 40
+
+    def __init__(self, fetch, **kwargs):
+        """
+        :param fetch: Функция (limit, before) -> список записей с ключом "cursor"
+        """
+        super().__init__(**kwargs)
+        self.fetch = fetch
+        self.cursors = [None]  # курсоры начала просмотренных страниц
+        self.last_cursor = None  # курсор последнего элемента текущей страницы
+        self.has_next = False
+
+    def load_page(self) -> list:
+        # Берём на один элемент больше, чтобы узнать, есть ли следующая страница
+        items = self.fetch(self.PAGE_SIZE + 1, self.cursors[-1])
+        self.has_next = len(items) > self.PAGE_SIZE
+        items = items[:self.PAGE_SIZE]
+        self.last_cursor = items[-1]["cursor"] if items else None
+        return items
+
+    def next_page(self):
+        if self.has_next and self.last_cursor:
+            self.cursors.append(self.last_cursor)
+            self.refresh_content()
+
+    def prev_page(self):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+            self.refresh_content()
+
+    def page_footer(self) -> str:
+        hints = []
+        if len(self.cursors) > 1:
+            hints.append("[dim]B[/dim] новее")
+        if self.has_next:
+            hints.append("[dim]N[/dim] старее")
+        return f"[dim]Страница {len(self.cursors)}[/dim]  " + "  ".join(hints)
+
+
+class AppliedVacanciesPanel(PagedListPanel):
     """Панель со списком откликов"""
 
     def __init__(self, **kwargs):
-        super().__init__(**kwargs)
+        super().__init__(fetch=get_applied_list, **kwargs)
         self.border_title = " ✅ Отклики "
 
     def compose(self) -> ComposeResult:
         yield Static(id="applied-list-content")
 
     def render_content(self) -> Text:
-        items = get_applied_list(100)
+        items = self.load_page()
 
         if not items:
             return Text.from_markup("[dim]Нет откликов[/dim]")
 
-        lines = [f"[bold green]✅ Всего откликов: {len(items)}[/bold green]", ""]
+        lines = [f"[bold green]✅ Всего откликов: {get_stats()['total']}[/bold green]", ""]
 
-        for item in items[:40]:
+        for item in items:
             # Название
             title = item.get("title", "")
             if title:
@@ -901,8 +1055,8 @@ class AppliedVacanciesPanel(Static):
             lines.append(f"[dim]{time_str}[/dim] [{acc_short}] [bold]{title}[/bold]{company}{salary}")
             lines.append(f"  [cyan dim]hh.ru/vacancy/{item['vacancy_id']}[/cyan dim]")
 
-        if len(items) > 40:
-            lines.append(f"[dim]... и ещё {len(items) - 40}[/dim]")
+        lines.append("")
+        lines.append(self.page_footer())
 
         return Text.from_markup("\n".join(lines))
 
@@ -913,25 +1067,25 @@ class AppliedVacanciesPanel(Static):
             pass
 
 
-class TestVacanciesPanel(Static):
+class TestVacanciesPanel(PagedListPanel):
     """Панель со списком вакансий с тестами"""
 
     def __init__(self, **kwargs):
-        super().__init__(**kwargs)
+        super().__init__(fetch=get_test_list, **kwargs)
         self.border_title = " 🧪 Вакансии с тестами "
 
     def compose(self) -> ComposeResult:
         yield Static(id="test-list-content")
 
     def render_content(self) -> Text:
-        items = get_test_list(100)
+        items = self.load_page()
 
         if not items:
             return Text.from_markup("[dim]Нет вакансий с тестами[/dim]")
 
-        lines = [f"[bold magenta]🧪 Всего вакансий с тестами: {len(items)}[/bold magenta]", ""]
+        lines = [f"[bold magenta]🧪 Всего вакансий с тестами: {get_stats()['tests']}[/bold magenta]", ""]
 
-        for item in items[:40]:
+        for item in items:
             # Название
             title = item.get("title", "")
             if title:
@@ -956,8 +1110,8 @@ class TestVacanciesPanel(Static):
             lines.append(f"[dim]{time_str}[/dim] [bold]{title}[/bold]{company}")
             lines.append(f"  [cyan dim]hh.ru/vacancy/{item['vacancy_id']}[/cyan dim]")
 
-        if len(items) > 40:
-            lines.append(f"[dim]... и ещё {len(items) - 40}[/dim]")
+        lines.append("")
+        lines.append(self.page_footer())
 
         return Text.from_markup("\n".join(lines))
 
@@ -1121,12 +1275,15 @@ class HHBotApp(App):
         ("q", "quit", "Выход"),
         ("p", "pause", "Пауза"),
         ("1", "setting_1", "Страниц"),
-        ("2", "setting_2", "Задержка"),
+        ("2", "setting_2", "Темп"),
         ("3", "setting_3", "Пауза цикла"),
         ("4", "setting_4", "Проверка лимита"),
+        ("5", "setting_5", "Уровень лога"),
         ("a", "show_applied", "Отклики"),
         ("t", "show_tests", "Тесты"),
         ("m", "show_main", "Главная"),
+        ("n", "next_page", "Дальше"),
+        ("b", "prev_page", "Назад"),
     ]
 
     current_view = reactive("main")  # main, applied, tests
@@ -1175,13 +1332,13 @@ class HHBotApp(App):
         self.global_stats.account_states = self.account_states
 
         # Логируем старт сессии
-        log_debug("=" * 80)
-        log_debug("🚀 НОВАЯ СЕССИЯ ЗАПУЩЕНА")
-        log_debug("=" * 80)
-        log_debug(f"Аккаунтов: {len(self.account_states)}")
+        log_debug("=" * 80, INFO)
+        log_debug("🚀 НОВАЯ СЕССИЯ ЗАПУЩЕНА", INFO)
+        log_debug("=" * 80, INFO)
+        log_debug(f"Аккаунтов: {len(self.account_states)}", INFO)
         for state in self.account_states:
-            log_debug(f"  - {state.name}: {len(state.acc['urls'])} URL")
-        log_debug("")
+            log_debug(f"  - {state.name}: {len(state.acc['urls'])} URL", INFO)
+        log_debug("", INFO)
 
         self.activity_log.add("", "", "🚀 Бот запущен", "success")
 
@@ -1209,18 +1366,32 @@ class HHBotApp(App):
         elif self.current_view == "tests":
             self.tests_panel.refresh_content()
 
+    def _rate_text(self) -> str:
+        """Текущий темп аккаунтов для footer: при адаптивном темпе - фактический по каждому"""
+        if not CONFIG.adaptive_rate:
+            return f"{CONFIG.account_rate}/мин"
+        rates = " ".join(str(round(s.rate_bucket.rate_per_min)) for s in self.account_states)
+        # Сколько раз темп снижали из-за 429, таймаутов и всплесков ошибок
+        cuts = sum(s.pacer.cuts for s in self.account_states if s.pacer)
+        return f"~{rates}/мин" + (f" ↓{cuts}" if cuts else "")
+
     def _update_footer(self):
         """Обновить footer с настройками"""
         try:
             pause_status = "[yellow]⏸ ПАУЗА[/yellow]" if self.paused else "[green]▶ РАБОТА[/green]"
+            dropped = debug_dropped()
+            dropped_text = f" [red]-{dropped}[/red]" if dropped else ""  # не попало в лог: очередь переполнена
             footer_text = (
                 f"{pause_status} │ "
                 f"[dim]1[/dim] Стр:[cyan]{CONFIG.pages_per_url}[/cyan] │ "
-                f"[dim]2[/dim] Задерж:[cyan]{CONFIG.response_delay}с[/cyan] │ "
+                f"[dim]2[/dim] Темп:[cyan]{self._rate_text()}[/cyan] │ "
                 f"[dim]3[/dim] Пауза:[cyan]{CONFIG.pause_between_cycles}с[/cyan] │ "
                 f"[dim]4[/dim] Лимит:[cyan]{CONFIG.limit_check_interval}м[/cyan] │ "
+                f"[dim]5[/dim] Лог:[cyan]{CONFIG.debug_log_level}[/cyan]{dropped_text} │ "
                 f"[dim]Q[/dim] Выход [dim]P[/dim] Пауза [dim]A[/dim] Отклики [dim]T[/dim] Тесты [dim]M[/dim] Главная"
             )
+            if self.current_view != "main":
+                footer_text += " [dim]N/B[/dim] Страницы"
             self.query_one("#footer", Static).update(Text.from_markup(footer_text))
         except:
             pass
@@ -1228,6 +1399,23 @@ class HHBotApp(App):
     @work(exclusive=False, thread=True)
     def run_account_worker(self, idx: int, state: AccountState) -> None:
         """Воркер для аккаунта"""
+        acc = state.acc
+        # Один event loop и пул соединений на аккаунт на всё время работы
+        http = AccountSession(
+            get_headers(acc["cookies"]["_xsrf"]), acc["cookies"],
+            limit=CONFIG.http_pool_limit,
+            dns_cache_ttl=CONFIG.http_dns_cache_ttl,
+            keepalive_timeout=CONFIG.http_keepalive,
+            limiter=RateLimiter(state.rate_bucket, GLOBAL_BUCKET),
+            pacer=state.pacer,
+        )
+        try:
+            self._account_loop(state, http)
+        finally:
+            http.close()
+
+    def _account_loop(self, state: AccountState, http: AccountSession) -> None:
+        """Основной цикл воркера аккаунта"""
         worker = get_current_worker()
         acc = state.acc
 
@@ -1253,7 +1441,7 @@ class HHBotApp(App):
 
                 if should_touch:
                     self.activity_log.add(state.short, state.color, "📤 Поднимаю резюме...", "info")
-                    success, message = touch_resume(acc)
+                    success, message = http.call(touch_resume, acc)
 
                     if success:
                         state.resume_touch_status = "✅ Поднято!"
@@ -1276,12 +1464,13 @@ class HHBotApp(App):
                     state.status_detail = "Проверка сброса лимита..."
                     self.activity_log.add(state.short, state.color, "🔍 Проверяю сброс лимита...", "info")
 
-                    if not check_limit(acc):
+                    if not http.call(check_limit, acc):
                         state.limit_exceeded = False
                         state.limit_reset_time = None
                         state.status_detail = ""
                         self.activity_log.add(state.short, state.color, "✅ Лимит сброшен! Продолжаю работу", "success")
-                        # Не делаем continue - сразу переходим к сбору вакансий
+                        # Не делаем continue - сразу к откликам по сохранённой очереди (или к сбору, если она пуста)
+                        state.resume_queue = True
                     else:
                         state.limit_reset_time = now + timedelta(minutes=CONFIG.limit_check_interval)
                         state.status = "limit"
@@ -1296,94 +1485,111 @@ class HHBotApp(App):
                     time.sleep(30)  # Проверяем состояние каждые 30 секунд
                     continue
 
-            # === СБОР ВАКАНСИЙ ===
-            state.status = "collecting"
-            state.status_detail = "Начинаю сбор..."
-            state.cycle_start_time = now
-            state.vacancies_by_url = {}
-
-            log_debug("-" * 80)
-            log_debug(f"📥 НАЧАЛО СБОРА: {state.name}")
-            log_debug(f"   Время: {now.strftime('%H:%M:%S')}")
-            log_debug("-" * 80)
-
-            self.activity_log.add(state.short, state.color, "📥 Начинаю сбор вакансий", "info")
-
-            all_vacancies = []
+            # Сохранённая очередь (после перезапуска или сброса лимита) - сразу к откликам, без сбора
+            resume = state.resume_queue and len(state.send_queue) > 0
+            state.resume_queue = False
 
-            for url_idx, url in enumerate(acc["urls"]):
-                if worker.is_cancelled or not self.running or self.paused:
-                    break
-
-                state.current_url = url
-                state.current_url_idx = url_idx
-                query = extract_search_query(url)
-                state.status_detail = f"Запрос: {query}"
-
-                log_debug(f"📍 URL {url_idx + 1}/{len(acc['urls'])}: {query}")
-                log_debug(f"   {url}")
+            if resume:
+                state.cycle_start_time = now
+                total_found = 0
+                filtered = []
+                already_count = test_count = rejected_count = 0
+                self.activity_log.add(state.short, state.color,
+                                      f"📋 Продолжаю сохранённую очередь: {len(state.send_queue)} вакансий", "info")
+            else:
+                # === СБОР ВАКАНСИЙ ===
+                state.status = "collecting"
+                state.status_detail = "Начинаю сбор..."
+                state.cycle_start_time = now
+                state.vacancies_by_url = {}
 
-                self.activity_log.add(state.short, state.color, f"Сканирую: {query}", "info")
+                log_debug("-" * 80, INFO)
+                log_debug(f"📥 НАЧАЛО СБОРА: {state.name}", INFO)
+                log_debug(f"   Время: {now.strftime('%H:%M:%S')}", INFO)
+                log_debug("-" * 80, INFO)
 
-                url_vacancies = asyncio.run(self._collect_from_url(state, url))
-                state.vacancies_by_url[url] = len(url_vacancies)
-                all_vacancies.extend(url_vacancies)
+                self.activity_log.add(state.short, state.color, "📥 Начинаю сбор вакансий", "info")
 
-                self.activity_log.add(state.short, state.color, f"📊 {query}: найдено {len(url_vacancies)} вакансий", "info")
-                state.action_history.append(f"{query}: найдено {len(url_vacancies)}")
+                self.activity_log.add(state.short, state.color,
+                                      f"Сканирую {len(acc['urls'])} запросов по {CONFIG.pages_per_url} стр.", "info")
 
-            # Уникальные вакансии
-            unique_vacancies = set(all_vacancies)
-            total_collected = len(unique_vacancies)
+                def should_stop() -> bool:
+                    return worker.is_cancelled or not self.running or self.paused
 
-            self.activity_log.add(state.short, state.color,
-                                  f"📊 Всего собрано: {len(all_vacancies)} ({total_collected} уникальных)",
-                                  "info")
+                total_found, unique_vacancies = http.run(self._collect_account(state, http, should_stop))
+                total_collected = len(unique_vacancies)
 
-            if not unique_vacancies:
-                state.status = "waiting"
-                state.status_detail = "Нет вакансий"
-                state.wait_until = now + timedelta(minutes=2)
-                self.activity_log.add(state.short, state.color, "⚠️ Не найдено ни одной вакансии, пауза 2 мин", "warning")
-                time.sleep(120)
-                continue
+                self.activity_log.add(state.short, state.color,
+                                      f"📊 Всего собрано: {total_found} ({total_collected} уникальных)",
+                                      "info")
+
+                if not unique_vacancies and not len(state.send_queue):
+                    state.status = "waiting"
+                    state.status_detail = "Нет вакансий"
+                    state.wait_until = now + timedelta(minutes=2)
+                    self.activity_log.add(state.short, state.color, "⚠️ Не найдено ни одной вакансии, пауза 2 мин", "warning")
+                    time.sleep(120)
+                    continue
 
-            # Фильтрация
-            filtered = []
-            already_count = 0
-            test_count = 0
+                # Фильтрация
+                new_ids, already_ids, test_ids = partition_vacancies(acc["name"], unique_vacancies)
+                filtered = list(new_ids)
+                already_count = len(already_ids)
+                test_count = len(test_ids)
+                state.already_applied += already_count
+                state.tests += test_count
 
-            for vid in unique_vacancies:
-                if is_applied(acc["name"], vid):
-                    already_count += 1
-                    state.already_applied += 1
-                elif is_test(vid):
-                    test_count += 1
-                    state.tests += 1
-                else:
-                    filtered.append(vid)
-
-            self.activity_log.add(state.short, state.color,
-                                  f"🔍 Фильтрация: ✅ уже {already_count}, 🧪 тест {test_count}, 🆕 новые {len(filtered)}",
-                                  "info")
+                self.activity_log.add(state.short, state.color,
+                                      f"🔍 Фильтрация: ✅ уже {already_count}, 🧪 тест {test_count}, 🆕 новые {len(filtered)}",
+                                      "info")
+
+                # Правила аккаунта по карточкам со страницы поиска - до того, как тратить лимит откликов
+                filtered, rejected = state.vacancy_filter.apply(filtered, state.vacancy_info)
+                rejected_count = sum(rejected.values())
+                if rejected_count:
+                    state.filter_rejected.update(rejected)
+                    state.skipped += rejected_count
+                    self.activity_log.add(state.short, state.color,
+                                          f"🚫 Отсеяно правилами: {format_rejected(rejected)}",
+                                          "info")
+
+            # Очередь по приоритету: новые вакансии вместе с оставшимися с прошлых циклов
+            carried = len(state.send_queue)
+            stale = state.send_queue.push(filtered, state.vacancy_info, state.vacancy_rank)
+            if stale:
+                # Отсечённые по queue_max_age считаются вместе с правилами фильтра
+                state.filter_rejected["stale"] += stale
+                state.skipped += stale
+                self.activity_log.add(state.short, state.color,
+                                      f"🚫 Старше {CONFIG.queue_max_age} ч, убрано из очереди: {stale}", "info")
+            if carried:
+                # Оставшиеся могли получить отклик или тест с другого клиента
+                pending = state.send_queue.ids()
+                for vid in pending - partition_vacancies(acc["name"], pending)[0]:
+                    state.send_queue.discard(vid)
+                if not resume:
+                    self.activity_log.add(state.short, state.color,
+                                          f"📋 С прошлых циклов в очереди: {carried}", "info")
+            STORE.save_queue(acc["name"], state.send_queue.entries())
+            filtered = state.send_queue.ordered()
 
             if not filtered:
                 state.status = "waiting"
                 state.status_detail = "Нет новых вакансий"
                 state.wait_until = now + timedelta(minutes=2)
                 self.activity_log.add(state.short, state.color,
-                                      f"⚠️ Все вакансии уже обработаны ({already_count} откликов, {test_count} тестов), пауза 2 мин",
+                                      f"⚠️ Все вакансии уже обработаны ({already_count} откликов, {test_count} тестов, "
+                                      f"{rejected_count} отсеяно), пауза 2 мин",
                                       "warning")
                 time.sleep(120)
                 continue
 
-            random.shuffle(filtered)
             state.vacancies_queue = filtered
             state.total_vacancies = len(filtered)
-            state.found_vacancies += len(all_vacancies)  # Увеличиваем счётчик найденных
+            state.found_vacancies += total_found  # Увеличиваем счётчик найденных
 
             self.activity_log.add(state.short, state.color,
-                                  f"✅ Найдено {len(filtered)} новых вакансий для отклика!",
+                                  f"✅ В очереди {len(filtered)} вакансий для отклика (свежие первыми)",
                                   "success")
             self.vacancy_queue.update_queue(state.short, state.color, filtered, 0)
 
@@ -1395,17 +1601,25 @@ class HHBotApp(App):
                 if worker.is_cancelled or not self.running or self.paused or state.limit_exceeded:
                     break
 
+                # Карточка со страницы поиска - известна ещё до отклика
+                card = state.vacancy_info.get(vid) or state.send_queue.card(vid)
                 state.current_vacancy_idx = i + 1
                 state.current_vacancy_id = vid
-                state.current_vacancy_title = ""  # Сбросим, обновится после ответа
-                state.current_vacancy_company = ""
+                state.current_vacancy_title = card.get("title") or ""  # Уточнится после ответа
+                state.current_vacancy_company = card.get("company") or ""
                 state.status_detail = f"{i + 1}/{state.total_vacancies}"
 
                 self.vacancy_queue.update_queue(state.short, state.color, filtered, i)
-                self.activity_log.add(state.short, state.color, f"📤 Отправляю отклик: {vid}", "info")
+                self.activity_log.add(state.short, state.color,
+                                      f"📤 Отправляю отклик: {(card.get('title') or vid)[:40]}", "info")
 
                 # Отправка
-                result, info = send_response(acc, vid)
+                result, info = http.call(send_response, acc, vid)
+                info = merge_vacancy_info(card, info)
+                if result != "limit":
+                    # Чекпоинт: после перезапуска очередь продолжится со следующей вакансии
+                    state.send_queue.discard(vid)  # после лимита вакансия остаётся первой в очереди
+                    STORE.remove_queued(acc["name"], vid)
 
                 if result == "sent":
                     state.sent += 1
@@ -1438,7 +1652,7 @@ class HHBotApp(App):
 
                 elif result == "already":
                     state.already_applied += 1
-                    add_applied(acc["name"], vid)
+                    add_applied(acc["name"], vid, info)
                     state.action_history.append(f"🔄 {vid}")
                     self.recent_responses.add_response(state.short, state.color, vid, "", "", "already")
                     # Логируем каждый 10-й чтобы не спамить
@@ -1466,8 +1680,6 @@ class HHBotApp(App):
                     debug_info = raw or exc or "unknown"
                     self.activity_log.add(state.short, state.color, f"❌ {vid}: {debug_info}", "error")
 
-                time.sleep(CONFIG.response_delay)
-
             # Очистка
             state.current_vacancy_id = ""
             state.current_vacancy_title = ""
@@ -1482,46 +1694,151 @@ class HHBotApp(App):
                                       f"⏳ Цикл завершён, пауза {CONFIG.pause_between_cycles}с", "info")
                 time.sleep(CONFIG.pause_between_cycles)
 
-    async def _collect_from_url(self, state: AccountState, url: str) -> list:
-        """Сбор вакансий с одного URL"""
+    async def _collect_account(self, state: AccountState, http: AccountSession, should_stop) -> tuple:
+        """
+        Сбор вакансий со всех URL аккаунта.
+        URL обходятся одновременно, одновременность ограничивает семафор аккаунта.
+        При полном проходе все страницы URL запрашиваются сразу; при инкрементальном -
+        по очереди, пока на странице есть ID новее отметки URL (см. VacancyStore.get_crawl_mark).
+        ID попадают в множество уникальных по мере прихода страниц.
+        Возвращает (сколько ID найдено всего, множество уникальных ID).
+        """
         acc = state.acc
-        headers = get_headers(acc["cookies"]["_xsrf"])
+        urls = acc["urls"]
         sem = asyncio.Semaphore(CONFIG.max_concurrent)
 
-        log_debug(f"🔑 Cookies: hhtoken={acc['cookies']['hhtoken'][:10]}...")
-        log_debug(f"   _xsrf={acc['cookies']['_xsrf'][:10]}...")
-
-        vacancies = []
-
-        # Создаём SSL context без проверки сертификата
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
-
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
-
-        async with aiohttp.ClientSession(headers=headers, cookies=acc["cookies"], connector=connector) as session:
+        if debug_enabled():
+            log_debug(f"🔑 Cookies: hhtoken={acc['cookies']['hhtoken'][:10]}...")
+            log_debug(f"   _xsrf={acc['cookies']['_xsrf'][:10]}...")
+
+        state.total_urls = len(urls)
+        state.total_pages = CONFIG.pages_per_url
+        state.current_url_idx = 0
+        state.current_page = 0
+        state.fetch_retries = 0
+        state.vacancy_info = {}
+        state.vacancy_rank = {}
+        deadline = time.monotonic() + CONFIG.collect_deadline
+
+        def on_retry():
+            state.fetch_retries += 1
+
+        found = {url: 0 for url in urls}  # url -> сколько ID найдено
+        pages_left = {url: CONFIG.pages_per_url for url in urls}
+        unique = set()
+        pages_done = 0
+        pages_skipped = 0
+        pages_shared = 0
+
+        def advance(url: str, pages: int):
+            """Отметить страницы URL как пройденные (загруженные или пропущенные)"""
+            nonlocal pages_done
+            # Прогресс: URL/страница считаются по числу уже пройденных страниц
+            pages_done += pages
+            state.current_url_idx, state.current_page = divmod(pages_done - 1, state.total_pages)
+            state.current_page += 1
+
+            pages_left[url] -= pages
+            if not pages_left[url]:
+                query = extract_search_query(url)
+                self.activity_log.add(state.short, state.color, f"📊 {query}: найдено {found[url]} вакансий", "info")
+                state.action_history.append(f"{query}: найдено {found[url]}")
+
+        async def load(url: str, page: int):
+            """Загрузить страницу: список ID или None, если страница не загружена"""
+            nonlocal pages_shared
+            if should_stop():
+                return None
             sep = "&" if "?" in url else "?"
 
-            for page in range(CONFIG.pages_per_url):
-                state.current_page = page + 1
-                page_url = f"{url}{sep}page={page}"
-
-                html = await fetch_page(session, page_url, sem)
-                if html:
-                    ids = parse_ids(html)
-                    vacancies.extend(ids)
-                    # Логируем только если ничего не найдено (для отладки)
-                    if not ids and page == 0:
-                        self.activity_log.add(state.short, state.color,
-                                              f"⚠️ Страница {page + 1}: вакансии не найдены (HTML: {len(html)} байт)",
-                                              "warning")
-                else:
+            async def fetch_parsed():
+                """Страница уже разобранной: (размер HTML, ID, карточки) - кэш делит и разбор"""
+                html = await fetch_page(http, f"{url}{sep}page={page}", sem, deadline, on_retry)
+                return (len(html), *parse_page(html)) if html else None
+
+            parsed, shared = await PAGE_CACHE.get(url, page, fetch_parsed)
+            pages_shared += shared
+            query = extract_search_query(url)
+            state.current_url = url
+            state.status_detail = f"Запрос: {query}"
+
+            ids = None
+            if parsed:
+                html_size, ids, records = parsed
+                state.vacancy_info.update(records)
+                rank = urls.index(url) + page
+                for vid in ids:
+                    state.vacancy_rank[vid] = min(rank, state.vacancy_rank.get(vid, rank))
+                found[url] += len(ids)
+                unique.update(ids)  # ids/records из кэша общие с другими аккаунтами - только читаем
+                # Логируем только если ничего не найдено (для отладки)
+                if not ids and page == 0:
                     self.activity_log.add(state.short, state.color,
-                                          f"❌ Страница {page + 1}: ошибка загрузки",
-                                          "error")
+                                          f"⚠️ {query}, страница {page + 1}: вакансии не найдены (HTML: {html_size} байт)",
+                                          "warning")
+            else:
+                self.activity_log.add(state.short, state.color,
+                                      f"❌ {query}, страница {page + 1}: ошибка загрузки",
+                                      "error")
+
+            # Последний обновлённый запрос - в конец, панель показывает последние
+            state.vacancies_by_url.pop(url, None)
+            state.vacancies_by_url[url] = found[url]
+
+            advance(url, 1)
+            return ids
+
+        async def crawl(url: str):
+            nonlocal pages_skipped
+            # По релевантности новая вакансия может оказаться на любой странице - такие URL всегда целиком
+            incremental = CONFIG.incremental_crawl and sorted_by_date(url)
+            mark = STORE.get_crawl_mark(acc["name"], url) if incremental else None
+            full = mark is None or mark[1] is None or \
+                datetime.now() - mark[1] >= timedelta(minutes=CONFIG.full_crawl_interval)
+
+            if full:
+                pages = await asyncio.gather(*(load(url, page) for page in range(CONFIG.pages_per_url)))
+            else:
+                high_water = mark[0]
+                pages = []
+                for page in range(CONFIG.pages_per_url):
+                    ids = await load(url, page)
+                    pages.append(ids)
+                    if ids is None:
+                        if should_stop():
+                            break
+                        continue  # ошибка загрузки ничего не говорит о странице - идём дальше
+                    # Пустая страница или только известные ID - дальше по времени публикации только старое
+                    new_ids = partition_vacancies(acc["name"], ids)[0]
+                    if not any(int(vid) > high_water for vid in new_ids):
+                        skipped = CONFIG.pages_per_url - page - 1
+                        if skipped:
+                            pages_skipped += skipped
+                            advance(url, skipped)
+                        break
+
+            loaded = [ids for ids in pages if ids is not None]
+            if incremental and loaded:
+                newest = max((int(vid) for ids in loaded for vid in ids), default=0)
+                STORE.set_crawl_mark(acc["name"], url, newest, full=full)
+
+        for url_idx, url in enumerate(urls):
+            log_debug(f"📍 URL {url_idx + 1}/{len(urls)}: {extract_search_query(url)}", INFO)
+            log_debug(f"   {url}")
+
+        await asyncio.gather(*(crawl(url) for url in urls))
+
+        if pages_skipped:
+            self.activity_log.add(state.short, state.color,
+                                  f"⏭️ Пропущено страниц без новых вакансий: {pages_skipped}", "info")
+        if pages_shared:
+            self.activity_log.add(state.short, state.color,
+                                  f"♻️ Страниц из общего кэша: {pages_shared}", "info")
+        if state.fetch_retries:
+            self.activity_log.add(state.short, state.color,
+                                  f"🔁 Повторных загрузок страниц: {state.fetch_retries}", "warning")
 
-        return vacancies
+        return sum(found.values()), unique
 
     def action_quit(self) -> None:
         self.running = False
@@ -1550,15 +1867,18 @@ class HHBotApp(App):
         self.activity_log.add("", "", f"⚙️ Страниц/запрос: {CONFIG.pages_per_url}", "info")
 
     def action_setting_2(self) -> None:
-        """Изменить задержку между откликами"""
-        values = [1, 2, 3, 5, 10]
-        current = CONFIG.response_delay
+        """Изменить темп запросов аккаунта"""
+        values = [10, 20, 30, 60, 120]
+        current = CONFIG.account_rate
         try:
             idx = values.index(current)
-            CONFIG.response_delay = values[(idx + 1) % len(values)]
+            CONFIG.account_rate = values[(idx + 1) % len(values)]
         except:
-            CONFIG.response_delay = 3
-        self.activity_log.add("", "", f"⚙️ Задержка отклика: {CONFIG.response_delay}с", "info")
+            CONFIG.account_rate = 20
+        for state in self.account_states:
+            # При адаптивном темпе это новая стартовая точка, дальше он подстраивается сам
+            (state.pacer or state.rate_bucket).set_rate(CONFIG.account_rate)
+        self.activity_log.add("", "", f"⚙️ Темп запросов: {CONFIG.account_rate}/мин", "info")
 
     def action_setting_3(self) -> None:
         """Изменить паузу между циклами"""
@@ -1582,6 +1902,16 @@ class HHBotApp(App):
             CONFIG.limit_check_interval = 30
         self.activity_log.add("", "", f"⚙️ Проверка лимита: {CONFIG.limit_check_interval}м", "info")
 
+    def action_setting_5(self) -> None:
+        """Изменить уровень отладочного лога"""
+        try:
+            idx = LEVELS.index(CONFIG.debug_log_level)
+            CONFIG.debug_log_level = LEVELS[(idx + 1) % len(LEVELS)]
+        except:
+            CONFIG.debug_log_level = "INFO"
+        set_debug_level(CONFIG.debug_log_level)
+        self.activity_log.add("", "", f"⚙️ Уровень лога: {CONFIG.debug_log_level}", "info")
+
     def _switch_view(self, view: str):
         """Переключение вида"""
         self.current_view = view
@@ -1603,6 +1933,26 @@ class HHBotApp(App):
         elif view == "tests":
             self.tests_panel.refresh_content()
 
+    def _list_panel(self):
+        """Панель списка в текущем виде (или None на главном экране)"""
+        if self.current_view == "applied":
+            return self.applied_panel
+        if self.current_view == "tests":
+            return self.tests_panel
+        return None
+
+    def action_next_page(self) -> None:
+        """Следующая (более старая) страница списка"""
+        panel = self._list_panel()
+        if panel:
+            panel.next_page()
+
+    def action_prev_page(self) -> None:
+        """Предыдущая (более новая) страница списка"""
+        panel = self._list_panel()
+        if panel:
+            panel.prev_page()
+
     def action_show_main(self) -> None:
         """Показать главный экран"""
         self._switch_view("main")
@@ -1622,4 +1972,7 @@ class HHBotApp(App):
 
 if __name__ == "__main__":
     app = HHBotApp()
-    app.run()
\ No newline at end of file
+    try:
+        app.run()
+    finally:
+        STORE.close()  # снимок индекса ID и сворачивание журнала
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Общий кэш страниц поиска
+========================
+Аккаунты часто ищут по одним и тем же URL (text=QA&area=1): без кэша каждый воркер
+скачивает и разбирает одни и те же страницы. PageCache хранит уже разобранную страницу
+поиска (ID и карточки) несколько секунд (ttl) по ключу (канонический URL, номер страницы)
+и схлопывает одновременные запросы: пока страница грузится для одного аккаунта,
+остальные ждут тот же результат, а не идут в сеть и не разбирают её сами.
+
+Воркеры аккаунтов живут в разных потоках и event loop'ах, поэтому ожидание идёт
+через concurrent.futures.Future, а словари защищены threading.Lock. Отмена ждущего
+(таймаут, остановка воркера) общий Future не трогает.
+
+Персональные выдачи (resume=... - рекомендации под резюме) в кэш не попадают.
+Неудачная загрузка не кэшируется: следующий запрос пойдёт в сеть.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Параметры URL, с которыми выдача зависит от аккаунта
+PERSONAL_PARAMS = {"resume"}
+
+
+def canonical_url(url: str) -> str:
+    """URL без page, с отсортированными параметрами: одинаковые поиски дают одинаковый ключ"""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query) if k != "page")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/") or "/",
+                       urlencode(query), ""))
+
+
+def is_personal(url: str) -> bool:
+    return any(k in PERSONAL_PARAMS for k, _ in parse_qsl(urlsplit(url).query))
+
+
+class PageCache:
+    """Страницы поиска, общие для всех аккаунтов"""
+
+    def __init__(self, ttl: float = 60, max_pages: int = 200):
+        """
+        :param ttl: Сколько секунд страница считается свежей (0 - кэш выключен)
+        :param max_pages: Сколько страниц держать в памяти (старые вытесняются первыми)
+        """
+        self._lock = threading.Lock()
+        self.ttl = ttl
+        self.max_pages = max_pages
+        self._pages = {}  # ключ -> (время загрузки, результат fetch)
+        self._loading = {}  # ключ -> Future с результатом fetch
+
+    async def get(self, url: str, page: int, fetch) -> tuple:
+        """
+        Страница url/page из кэша или через fetch() - корутину, возвращающую результат или None
+        (страница не загружена). Возвращает (результат, True если страницу загрузил не этот вызов).
+        """
+        if not self.ttl or is_personal(url):
+            return await fetch(), False
+
+        key = (canonical_url(url), page)
+        with self._lock:
+            cached = self._pages.get(key)
+            if cached and time.monotonic() - cached[0] < self.ttl:
+                return cached[1], True
+            loading = self._loading.get(key)
+            if loading is None:
+                future = self._loading[key] = Future()
+
+        if loading is not None:
+            # shield: отмена этого ожидания не должна отменять общий Future загружающего
+            return await asyncio.shield(asyncio.wrap_future(loading)), True
+
+        value = None
+        try:
+            value = await fetch()
+        finally:
+            # Ждущие получают результат и при ошибке/отмене загрузки (None - страница не загружена)
+            with self._lock:
+                del self._loading[key]
+                if value:
+                    self._store(key, value)
+            if not future.done():
+                future.set_result(value)
+        return value, False
+
+    def _store(self, key, value):
+        now = time.monotonic()
+        self._pages.pop(key, None)
+        self._pages[key] = (now, value)
+        # Вытесняем протухшие и самые старые сверх лимита (словарь хранит порядок вставки)
+        for old_key, (stamp, _) in list(self._pages.items()):
+            if len(self._pages) <= self.max_pages and now - stamp < self.ttl:
+                break
+            del self._pages[old_key]
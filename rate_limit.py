@@ -0,0 +1,150 @@
+"""
+Ограничение частоты запросов
+============================
+Token bucket: ведро на burst токенов пополняется со скоростью rate запросов в минуту,
+каждый запрос забирает токен. Если токенов нет, запрос ждёт ровно столько,
+сколько нужно до следующего токена, поэтому время самого запроса не добавляется к паузе
+и фактический темп совпадает с заданным.
+
+Ведро потокобезопасно: одно глобальное ведро (на IP) делят воркеры всех аккаунтов.
+
+AimdPacer подбирает темп ведра сам: +increase за каждый чистый ответ,
+×decrease при 429, таймауте или всплеске ошибок, в пределах [min_rate, max_rate].
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+
+class TokenBucket:
+    """Ведро токенов с темпом в запросах в минуту (0 - без ограничения)"""
+
+    def __init__(self, rate_per_min: float, burst: int = 1):
+        """
+        :param rate_per_min: Темп пополнения (запросов в минуту)
+        :param burst: Ёмкость ведра - сколько запросов можно сделать подряд без пауз
+        """
+        self._lock = threading.Lock()
+        self.rate_per_min = rate_per_min
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+
+    def set_rate(self, rate_per_min: float):
+        """Изменить темп на ходу (накопленные токены сохраняются)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate_per_min = rate_per_min
+
+    def reserve(self) -> float:
+        """Забрать токен. Возвращает, сколько секунд нужно подождать до запроса"""
+        with self._lock:
+            if self.rate_per_min <= 0:
+                return 0.0
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            # Токены в долг: очередь ожидающих выстраивается по 60/rate секунд
+            return -self._tokens * 60 / self.rate_per_min
+
+    def _refill(self, now: float):
+        if self.rate_per_min > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate_per_min / 60)
+        self._stamp = now
+
+
+class RateLimiter:
+    """Несколько вёдер сразу (аккаунт + общее на IP): запрос ждёт самое медленное"""
+
+    def __init__(self, *buckets):
+        self.buckets = [bucket for bucket in buckets if bucket is not None]
+
+    def reserve(self) -> float:
+        return max((bucket.reserve() for bucket in self.buckets), default=0.0)
+
+    def acquire(self):
+        """Дождаться разрешения на запрос (блокирует поток)"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Дождаться разрешения на запрос внутри event loop"""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AimdPacer:
+    """Адаптивный темп ведра: аддитивный рост, мультипликативное снижение (AIMD)"""
+
+    def __init__(self, bucket: TokenBucket, min_rate: float, max_rate: float,
+                 increase: float = 1.0, decrease: float = 0.5,
+                 window: int = 20, error_ratio: float = 0.3, cooldown: float = 10.0):
+        """
+        :param bucket: Ведро, темпом которого управляем
+        :param min_rate: Нижняя граница темпа (запросов в минуту)
+        :param max_rate: Верхняя граница темпа
+        :param increase: На сколько поднимать темп после чистого ответа
+        :param decrease: Во сколько раз снижать темп при перегрузке
+        :param window: По скольким последним ответам считать долю ошибок
+        :param error_ratio: Доля ошибок в окне, считающаяся всплеском
+        :param cooldown: Не снижать темп чаще, чем раз в столько секунд
+                         (одна перегрузка даёт пачку 429 от параллельных запросов)
+        """
+        self._lock = threading.Lock()
+        self.bucket = bucket
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.error_ratio = error_ratio
+        self.cooldown = cooldown
+        self.cuts = 0
+        self._recent = deque(maxlen=window)  # True - ошибка
+        self._last_cut = -cooldown
+        self._set(bucket.rate_per_min)
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate_per_min
+
+    def set_rate(self, rate_per_min: float):
+        """Задать темп вручную (с учётом границ)"""
+        with self._lock:
+            self._set(rate_per_min)
+
+    def success(self):
+        """Чистый ответ: темп растёт на increase"""
+        with self._lock:
+            self._recent.append(False)
+            self._set(self.rate + self.increase)
+
+    def error(self):
+        """Ошибка (5xx, обрыв соединения): снижаем темп, если ошибки пошли всплеском"""
+        with self._lock:
+            self._recent.append(True)
+            if len(self._recent) == self._recent.maxlen and \
+                    sum(self._recent) >= self.error_ratio * len(self._recent):
+                self._cut()
+
+    def throttle(self):
+        """429 или таймаут: сразу снижаем темп"""
+        with self._lock:
+            self._recent.append(True)
+            self._cut()
+
+    def _cut(self):
+        now = time.monotonic()
+        if now - self._last_cut < self.cooldown:
+            return
+        self._last_cut = now
+        self.cuts += 1
+        self._recent.clear()
+        self._set(self.rate * self.decrease)
+
+    def _set(self, rate_per_min: float):
+        self.bucket.set_rate(min(self.max_rate, max(self.min_rate, rate_per_min)))
@@ -0,0 +1,150 @@
+"""
+Очередь откликов по приоритету
+==============================
+Вместо случайного порядка вакансии отправляются по очкам: первыми свежие, с подходящей
+зарплатой и найденные раньше в выдаче (первые URL аккаунта, первые страницы).
+Если дневной лимит обрывает отправку, лучшие кандидаты к этому моменту уже отправлены.
+
+Очки считаются в часах "возраста" (меньше - лучше):
+    ключ = -время публикации (ч) + rank_penalty * позиция в выдаче - salary_bonus (если зарплата подходит)
+Время публикации берётся с карточки; если его нет - время, когда вакансию впервые увидели.
+Ключ не зависит от текущего момента, поэтому куча остаётся упорядоченной между циклами:
+неотправленные вакансии ждут следующего цикла вместе с новыми.
+
+entries()/restore() выгружают и загружают очередь для хранения на диске
+(VacancyStore.save_queue/load_queue), очки при загрузке пересчитываются по текущим настройкам.
+"""
+
+import heapq
+import time
+from datetime import datetime
+
+
+class SendQueue:
+    """Куча вакансий аккаунта, упорядоченная по очкам приоритета"""
+
+    def __init__(self, salary_min: int = None, salary_bonus: float = 24.0, rank_penalty: float = 1.0,
+                 max_age_hours: float = 0, max_size: int = 0):
+        """
+        :param salary_min: Порог зарплаты аккаунта (без порога бонус дают за любую указанную зарплату)
+        :param salary_bonus: Сколько часов свежести стоит подходящая зарплата
+        :param rank_penalty: Сколько часов свежести стоит одна позиция в выдаче (URL или страница)
+        :param max_age_hours: Вакансии старше этого выбрасываются из очереди (0 - не выбрасывать)
+        :param max_size: Сколько вакансий держать, лишние - с худшими очками (0 - без предела)
+        """
+        self.salary_min = salary_min
+        self.salary_bonus = salary_bonus
+        self.rank_penalty = rank_penalty
+        self.max_age_hours = max_age_hours
+        self.max_size = max_size
+        self._entries = {}  # id -> {"key", "published", "rank", "card"}
+        self._heap = []  # (key, id); записи удалённых ID пропускаются при чтении
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, vacancy_id: str) -> bool:
+        return vacancy_id in self._entries
+
+    def ids(self) -> set:
+        return set(self._entries)
+
+    def card(self, vacancy_id: str) -> dict:
+        """Карточка вакансии со страницы поиска (сохраняется вместе с очередью)"""
+        entry = self._entries.get(vacancy_id)
+        return entry["card"] if entry else {}
+
+    def push(self, vacancy_ids, records: dict = None, ranks: dict = None) -> int:
+        """
+        Добавить вакансии. Уже стоящие в очереди сохраняют время, когда их впервые увидели,
+        а позиция в выдаче берётся лучшая из старой и новой.
+        Возвращает, сколько вакансий выброшено по max_age_hours/max_size.
+        """
+        records = records or {}
+        ranks = ranks or {}
+        now = time.time()
+        for vid in vacancy_ids:
+            card = records.get(vid) or {}
+            rank = ranks.get(vid, 0)
+            old = self._entries.get(vid)
+            if old is not None:
+                card = card or old["card"]
+                rank = min(rank, old["rank"])
+            published = _timestamp(card.get("published_at")) or (old["published"] if old else now)
+            self._add(vid, published, rank, card)
+        return self._trim(now)
+
+    def entries(self) -> list:
+        """Содержимое очереди для сохранения: [(id, published, rank, card)]"""
+        return [(vid, e["published"], e["rank"], e["card"]) for vid, e in self._entries.items()]
+
+    def restore(self, entries: list) -> int:
+        """Загрузить сохранённую очередь (см. entries). Возвращает, сколько выброшено при загрузке"""
+        for vid, published, rank, card in entries:
+            self._add(vid, published, rank, card)
+        return self._trim(time.time())
+
+    def discard(self, vacancy_id: str):
+        """Убрать вакансию (отправлена, тест, уже откликались или ушла из выдачи)"""
+        self._entries.pop(vacancy_id, None)
+
+    def ordered(self) -> list:
+        """ID в порядке отправки (лучшие первыми)"""
+        return [vid for key, vid in sorted(self._heap) if self._live(key, vid)]
+
+    def score(self, published: float, rank: int, card: dict) -> float:
+        key = -published / 3600 + self.rank_penalty * rank
+        if self._salary_matches(card):
+            key -= self.salary_bonus
+        return key
+
+    def _salary_matches(self, card: dict) -> bool:
+        top = card.get("salary_to") or card.get("salary_from")
+        if not top or card.get("currency") not in (None, "RUR"):
+            return False
+        return not self.salary_min or top >= self.salary_min
+
+    def _add(self, vid: str, published: float, rank: int, card: dict):
+        key = self.score(published, rank, card)
+        self._entries[vid] = {"key": key, "published": published, "rank": rank, "card": card}
+        heapq.heappush(self._heap, (key, vid))
+
+    def _live(self, key: float, vid: str) -> bool:
+        """Запись кучи актуальна: ID не удалён и не добавлен заново с другими очками"""
+        entry = self._entries.get(vid)
+        return entry is not None and entry["key"] == key
+
+    def _trim(self, now: float) -> int:
+        """Выбросить протухшие вакансии и лишние с худшими очками, пересобрать кучу. Возвращает число выброшенных"""
+        dropped = 0
+        if self.max_age_hours:
+            oldest = now - self.max_age_hours * 3600
+            for vid in [vid for vid, e in self._entries.items() if e["published"] < oldest]:
+                del self._entries[vid]
+                dropped += 1
+        entries = sorted((e["key"], vid) for vid, e in self._entries.items())
+        if self.max_size and len(entries) > self.max_size:
+            for _, vid in entries[self.max_size:]:
+                del self._entries[vid]
+                dropped += 1
+            entries = entries[:self.max_size]
+        self._heap = entries  # отсортированный список - уже куча
+        return dropped
+
+
+def _timestamp(value):
+    """Время публикации с карточки (unix-время в с или мс, либо ISO-строка) -> unix-время или None"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    text = str(value).strip()
+    if text.isdigit():
+        return _timestamp(int(text))
+    for fmt in (None, "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%S.%f%z"):
+        try:
+            parsed = datetime.fromisoformat(text) if fmt is None else datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return parsed.timestamp()
+    return None
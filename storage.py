@@ -0,0 +1,506 @@
+"""
+Хранилище откликов на SQLite
+============================
+Индексированный доступ по (аккаунт, vacancy_id) вместо перечитывания JSON-файлов.
+
+База работает в режиме WAL: каждый отклик - это дозапись в журнал (data/vacancies.db-wal),
+основной файл не переписывается. Фоновый поток периодически сворачивает журнал в базу
+(checkpoint), а после падения SQLite сам дочитывает хвост журнала при открытии.
+
+Одну базу одновременно используют multi-v2.py и telegram_bot.py: блокировки и транзакции
+берёт на себя SQLite, а индекс ID в памяти догружает чужие записи по PRAGMA data_version.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from id_index import IdIndex, IndexFile
+
+# Аккаунт, под которым хранятся отклики telegram_bot.py
+TELEGRAM_ACCOUNT = "Telegram"
+
+# Размер, до которого усекается WAL-журнал после сворачивания
+WAL_SIZE_LIMIT = 4 * 1024 * 1024
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS applied (
+    id INTEGER PRIMARY KEY,
+    account TEXT NOT NULL,
+    vacancy_id TEXT NOT NULL,
+    url TEXT,
+    title TEXT,
+    company TEXT,
+    salary_from,
+    salary_to,
+    at TEXT NOT NULL,
+    UNIQUE (account, vacancy_id)
+);
+CREATE INDEX IF NOT EXISTS applied_at ON applied (at);
+
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    vacancy_id TEXT NOT NULL UNIQUE,
+    url TEXT,
+    title TEXT,
+    company TEXT,
+    at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tests_at ON tests (at);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+-- Счётчики для get_stats(): обновляются триггерами в той же транзакции, что и вставка
+CREATE TABLE IF NOT EXISTS counters (
+    kind TEXT NOT NULL,
+    account TEXT NOT NULL,
+    day TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (kind, account, day)
+);
+
+-- Инкрементальный сбор: самый новый ID, виденный на поисковом URL аккаунта,
+-- и время последнего полного прохода по всем страницам
+CREATE TABLE IF NOT EXISTS crawl_marks (
+    account TEXT NOT NULL,
+    url TEXT NOT NULL,
+    vacancy_id INTEGER NOT NULL,
+    full_at TEXT,
+    PRIMARY KEY (account, url)
+);
+
+-- Очередь откликов аккаунта (см. send_queue.py): переживает перезапуск,
+-- строка удаляется сразу после отклика на вакансию
+CREATE TABLE IF NOT EXISTS send_queue (
+    account TEXT NOT NULL,
+    vacancy_id TEXT NOT NULL,
+    published REAL NOT NULL,
+    rank INTEGER NOT NULL,
+    card TEXT,
+    PRIMARY KEY (account, vacancy_id)
+);
+
+CREATE TRIGGER IF NOT EXISTS applied_count AFTER INSERT ON applied BEGIN
+    INSERT INTO counters (kind, account, day, n) VALUES ('applied', NEW.account, substr(NEW.at, 1, 10), 1)
+    ON CONFLICT (kind, account, day) DO UPDATE SET n = n + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tests_count AFTER INSERT ON tests BEGIN
+    INSERT INTO counters (kind, account, day, n) VALUES ('tests', '', substr(NEW.at, 1, 10), 1)
+    ON CONFLICT (kind, account, day) DO UPDATE SET n = n + 1;
+END;
+"""
+
+# Пересчёт счётчиков для баз, созданных до появления таблицы counters
+REBUILD_COUNTERS = """
+DELETE FROM counters;
+INSERT INTO counters (kind, account, day, n)
+    SELECT 'applied', account, substr(at, 1, 10), COUNT(*) FROM applied GROUP BY account, substr(at, 1, 10);
+INSERT INTO counters (kind, account, day, n)
+    SELECT 'tests', '', substr(at, 1, 10), COUNT(*) FROM tests GROUP BY substr(at, 1, 10);
+INSERT OR REPLACE INTO meta (key, value) VALUES ('counters', 'ok');
+"""
+
+
+def vacancy_url(vacancy_id: str) -> str:
+    return f"https://hh.ru/vacancy/{vacancy_id}"
+
+
+class VacancyStore:
+    """Отклики и вакансии с тестами в одной SQLite базе (WAL)"""
+
+    def __init__(self, db_path: Path, checkpoint_interval: float = 60):
+        """
+        :param db_path: Путь к файлу базы
+        :param checkpoint_interval: Период сворачивания журнала в секундах (0 - не запускать фоновый поток)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._conn.row_factory = sqlite3.Row
+        # Запись только дописывает журнал, сворачивает его фоновый поток
+        self._conn.execute("PRAGMA wal_autocheckpoint=0")
+        self._conn.executescript(SCHEMA)
+        if not self._conn.execute("SELECT 1 FROM meta WHERE key = 'counters'").fetchone():
+            self._conn.executescript(f"BEGIN; {REBUILD_COUNTERS} COMMIT;")
+
+        # Компактный индекс ID (см. id_index.py): снимок с диска + догрузка новых строк по rowid
+        self._index = IndexFile(self.db_path.with_suffix(".idx"))
+        self._applied_rowid = 0
+        self._tests_rowid = 0
+        self._saved_rowids = (0, 0)
+        self._load_index()
+        self._writes = 0  # число своих записей (PRAGMA data_version их не учитывает)
+        self._index_version = None
+        self._stats = None
+        self._stats_version = None
+
+        self._stop = threading.Event()
+        self._compactor = None
+        if checkpoint_interval:
+            self._compactor = threading.Thread(
+                target=self._compact_loop, args=(checkpoint_interval,),
+                name="vacancy-store-checkpoint", daemon=True,
+            )
+            self._compactor.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA journal_size_limit={WAL_SIZE_LIMIT}")
+        return conn
+
+    def close(self):
+        self._stop.set()
+        if self._compactor:
+            self._compactor.join()
+        self.save_index()
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+            self._index.close()
+
+    # ---------- журнал ----------
+
+    def checkpoint(self, truncate: bool = False) -> tuple:
+        """
+        Свернуть WAL-журнал в основной файл базы.
+        Возвращает (busy, страниц в журнале, перенесено страниц).
+        """
+        mode = "TRUNCATE" if truncate else "PASSIVE"
+        with self._lock:
+            return tuple(self._conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone())
+
+    def _compact_loop(self, interval: float):
+        # Отдельное соединение, чтобы не держать общий lock на время переноса страниц
+        conn = self._connect()
+        try:
+            while not self._stop.wait(interval):
+                try:
+                    conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+                except sqlite3.Error:
+                    pass  # база занята - попробуем в следующий раз
+                self.save_index()
+        finally:
+            conn.close()
+
+    # ---------- запись ----------
+
+    def add_applied(self, account: str, vacancy_id: str, info: dict = None):
+        info = info or {}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO applied (account, vacancy_id, url, title, company, salary_from, salary_to, at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (account, vacancy_id) DO UPDATE SET "
+                "url = excluded.url, title = excluded.title, company = excluded.company, "
+                "salary_from = excluded.salary_from, salary_to = excluded.salary_to, at = excluded.at",
+                (account, vacancy_id, vacancy_url(vacancy_id),
+                 info.get("title", ""), info.get("company", ""),
+                 info.get("salary_from"), info.get("salary_to"),
+                 datetime.now().isoformat()),
+            )
+            self._writes += 1
+
+    def add_test(self, vacancy_id: str, title: str = "", company: str = ""):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO tests (vacancy_id, url, title, company, at) VALUES (?, ?, ?, ?, ?)",
+                (vacancy_id, vacancy_url(vacancy_id), title, company, datetime.now().isoformat()),
+            )
+            self._writes += 1
+
+    def set_crawl_mark(self, account: str, url: str, vacancy_id: int, full: bool = False):
+        """Сдвинуть отметку URL вперёд до vacancy_id (назад не двигается); full - был полный проход"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO crawl_marks (account, url, vacancy_id, full_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (account, url) DO UPDATE SET "
+                "vacancy_id = MAX(vacancy_id, excluded.vacancy_id), "
+                "full_at = COALESCE(excluded.full_at, full_at)",
+                (account, url, vacancy_id, datetime.now().isoformat() if full else None),
+            )
+
+    def save_queue(self, account: str, entries: list):
+        """Заменить сохранённую очередь откликов аккаунта: entries - [(id, published, rank, card)]"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM send_queue WHERE account = ?", (account,))
+            self._conn.executemany(
+                "INSERT INTO send_queue (account, vacancy_id, published, rank, card) VALUES (?, ?, ?, ?, ?)",
+                [(account, vid, published, rank, json.dumps(card, ensure_ascii=False))
+                 for vid, published, rank, card in entries],
+            )
+
+    def remove_queued(self, account: str, vacancy_id: str):
+        """Убрать вакансию из сохранённой очереди (чекпоинт после каждого отклика)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM send_queue WHERE account = ? AND vacancy_id = ?",
+                               (account, vacancy_id))
+
+    # ---------- чтение ----------
+
+    def load_queue(self, account: str) -> list:
+        """Сохранённая очередь откликов аккаунта: [(id, published, rank, card)]"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT vacancy_id, published, rank, card FROM send_queue WHERE account = ?", (account,)
+            ).fetchall()
+        return [(row["vacancy_id"], row["published"], row["rank"], json.loads(row["card"]) if row["card"] else {})
+                for row in rows]
+
+    def get_crawl_mark(self, account: str, url: str):
+        """(самый новый виденный ID, время полного прохода или None) либо None, если URL ещё не проходили"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vacancy_id, full_at FROM crawl_marks WHERE account = ? AND url = ?", (account, url)
+            ).fetchone()
+        if row is None:
+            return None
+        return row["vacancy_id"], datetime.fromisoformat(row["full_at"]) if row["full_at"] else None
+
+    def is_applied(self, account: str, vacancy_id: str) -> bool:
+        with self._lock:
+            self._sync_index()
+            return vacancy_id in self._applied_index(account)
+
+    def is_test(self, vacancy_id: str) -> bool:
+        with self._lock:
+            self._sync_index()
+            return vacancy_id in self._tests_index()
+
+    def partition(self, account: str, vacancy_ids) -> tuple:
+        """
+        Разбить собранные ID на (новые, уже откликались, с тестом) одним проходом
+        по индексу в памяти. Стоимость зависит только от числа собранных ID.
+        """
+        new, already, tests = set(), set(), set()
+        with self._lock:
+            self._sync_index()
+            applied_index = self._applied_index(account)
+            tests_index = self._tests_index()
+            for vid in set(vacancy_ids):
+                if vid in applied_index:
+                    already.add(vid)
+                elif vid in tests_index:
+                    tests.add(vid)
+                else:
+                    new.add(vid)
+        return new, already, tests
+
+    # ---------- индекс ID ----------
+
+    def _applied_index(self, account: str) -> IdIndex:
+        return self._index.sections.setdefault(f"applied:{account}", IdIndex())
+
+    def _tests_index(self) -> IdIndex:
+        return self._index.sections.setdefault("tests", IdIndex())
+
+    def _load_index(self):
+        """Открыть снимок индекса, если он соответствует текущей базе"""
+        if not self._index.load():
+            return
+        meta = self._index.meta
+        max_applied = self._conn.execute("SELECT IFNULL(MAX(id), 0) FROM applied").fetchone()[0]
+        max_tests = self._conn.execute("SELECT IFNULL(MAX(id), 0) FROM tests").fetchone()[0]
+        applied_rowid = meta.get("applied_rowid", 0)
+        tests_rowid = meta.get("tests_rowid", 0)
+        if applied_rowid > max_applied or tests_rowid > max_tests:
+            # Снимок от другой базы (например, vacancies.db удалили) - перестраиваем с нуля
+            self._index.close()
+            return
+        self._applied_rowid = applied_rowid
+        self._tests_rowid = tests_rowid
+        self._saved_rowids = (applied_rowid, tests_rowid)
+
+    def save_index(self):
+        """Сохранить снимок индекса на диск, если в нём есть новые ID"""
+        with self._lock:
+            self._sync_index()
+            rowids = (self._applied_rowid, self._tests_rowid)
+            if rowids == self._saved_rowids:
+                return
+            try:
+                self._index.save({"applied_rowid": rowids[0], "tests_rowid": rowids[1]})
+            except OSError:
+                return  # снимок best-effort: при следующем старте догрузим из базы
+            self._saved_rowids = rowids
+
+    def _sync_index(self):
+        """Догрузить в индекс строки, добавленные после последней синхронизации"""
+        version = self._version()
+        if version == self._index_version:
+            return
+        self._index_version = version
+
+        by_account = {}
+        for row_id, account, vacancy_id in self._conn.execute(
+            "SELECT id, account, vacancy_id FROM applied WHERE id > ? ORDER BY id", (self._applied_rowid,)
+        ):
+            by_account.setdefault(account, []).append(vacancy_id)
+            self._applied_rowid = row_id
+        for account, vacancy_ids in by_account.items():
+            self._applied_index(account).update(vacancy_ids)
+
+        test_ids = []
+        for row_id, vacancy_id in self._conn.execute(
+            "SELECT id, vacancy_id FROM tests WHERE id > ? ORDER BY id", (self._tests_rowid,)
+        ):
+            test_ids.append(vacancy_id)
+            self._tests_rowid = row_id
+        self._tests_index().update(test_ids)
+
+    def _version(self) -> tuple:
+        """Меняется при любой записи в базу: своей или из другого соединения/процесса"""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0], self._writes
+
+    def get_stats(self) -> dict:
+        """
+        Итоги по счётчикам: total, tests, by_acc, today, today_by_acc, by_day.
+        Счётчики перечитываются только после записи в базу, иначе отдаётся кэш.
+        """
+        with self._lock:
+            # Дата в версии - чтобы "сегодня" пересчиталось после полуночи
+            version = self._version() + (datetime.now().date(),)
+            if version != self._stats_version:
+                self._stats = self._read_stats()
+                self._stats_version = version
+            return dict(self._stats)
+
+    def _read_stats(self) -> dict:
+        today = datetime.now().strftime("%Y-%m-%d")
+        by_acc, today_by_acc, by_day = {}, {}, {}
+        tests = 0
+        for kind, account, day, n in self._conn.execute("SELECT kind, account, day, n FROM counters"):
+            if kind == "tests":
+                tests += n
+                continue
+            by_acc[account] = by_acc.get(account, 0) + n
+            by_day[day] = by_day.get(day, 0) + n
+            if day == today:
+                today_by_acc[account] = today_by_acc.get(account, 0) + n
+        return {
+            "total": sum(by_acc.values()),
+            "tests": tests,
+            "by_acc": by_acc,
+            "today": sum(today_by_acc.values()),
+            "today_by_acc": today_by_acc,
+            "by_day": by_day,
+        }
+
+    def get_applied_list(self, limit: int = 50, before: list = None) -> list:
+        """
+        Последние отклики (новые первые) по индексу applied_at: O(limit) независимо от размера истории.
+        before - курсор ("cursor" последнего элемента предыдущей страницы) для следующей страницы.
+        """
+        sql = "SELECT id, account, vacancy_id, url, title, company, salary_from, salary_to, at FROM applied "
+        return self._page(sql, limit, before)
+
+    def get_test_list(self, limit: int = 50, before: list = None) -> list:
+        """Последние вакансии с тестами (новые первые), курсор - как в get_applied_list"""
+        sql = "SELECT id, vacancy_id, url, title, company, at FROM tests "
+        return self._page(sql, limit, before)
+
+    def _page(self, sql: str, limit: int, before: list = None) -> list:
+        params = []
+        if before:
+            sql += "WHERE (at, id) < (?, ?) "
+            params += list(before)
+        sql += "ORDER BY at DESC, id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit]).fetchall()
+        items = []
+        for row in rows:
+            item = dict(row)
+            item["cursor"] = [item["at"], item.pop("id")]
+            items.append(item)
+        return items
+
+    # ---------- импорт старых JSON ----------
+
+    def import_json(self, applied_file: Path, tests_file: Path) -> int:
+        """
+        Однократный импорт data/*.json из старых форматов:
+        multi-v2.py ({аккаунт: {vid: {...}}}) и telegram_bot.py ({"vacancy_ids": [...]}).
+        Файл помечается импортированным в meta и больше не читается.
+        Битый JSON не помечается - его можно починить и импортировать при следующем запуске.
+        Возвращает число импортированных записей.
+        """
+        imported = 0
+
+        applied = self._read_legacy(applied_file)
+        if applied is not None:
+            rows = []
+            # Формат telegram_bot.py: {"vacancy_ids": [...]}
+            if isinstance(applied.get("vacancy_ids"), list):
+                applied = {TELEGRAM_ACCOUNT: {str(vid): {} for vid in applied.pop("vacancy_ids")}, **applied}
+            for account, vacancies in applied.items():
+                if not isinstance(vacancies, dict):
+                    continue
+                for vid, info in vacancies.items():
+                    if not isinstance(info, dict):
+                        continue  # битая запись - пропускаем, как раньше load_json
+                    rows.append((
+                        account, vid, info.get("url") or vacancy_url(vid),
+                        info.get("title", ""), info.get("company", ""),
+                        info.get("salary_from"), info.get("salary_to"),
+                        info.get("at") or datetime.now().isoformat(),
+                    ))
+            imported += self._import_rows(
+                applied_file,
+                "INSERT OR IGNORE INTO applied (account, vacancy_id, url, title, company, salary_from, salary_to, at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+        tests = self._read_legacy(tests_file)
+        if tests is not None:
+            rows = [
+                (vid, info.get("url") or vacancy_url(vid), info.get("title", ""), info.get("company", ""),
+                 info.get("at") or datetime.now().isoformat())
+                for vid, info in tests.items()
+                if isinstance(info, dict)
+            ]
+            imported += self._import_rows(
+                tests_file,
+                "INSERT OR IGNORE INTO tests (vacancy_id, url, title, company, at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+        return imported
+
+    def _read_legacy(self, filepath: Path):
+        """Содержимое JSON-файла или None, если импортировать нечего"""
+        filepath = Path(filepath)
+        if not filepath.exists():
+            return None
+        with self._lock:
+            done = self._conn.execute(
+                "SELECT 1 FROM meta WHERE key = ?", (f"imported:{filepath.name}",)
+            ).fetchone()
+        if done:
+            return None
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return data if isinstance(data, dict) else None
+
+    def _import_rows(self, filepath: Path, sql: str, rows: list) -> int:
+        with self._lock, self._conn:
+            # rowcount - только строки целевой таблицы (total_changes считает и записи триггеров в counters)
+            count = max(self._conn.executemany(sql, rows).rowcount, 0)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (f"imported:{Path(filepath).name}", datetime.now().isoformat()),
+            )
+            self._writes += 1
+        return count
@@ -25,6 +25,10 @@ from telegram.ext import (
 from playwright.async_api import async_playwright, Browser, Page, BrowserContext
 import logging
 
+from storage import VacancyStore, TELEGRAM_ACCOUNT
+from hh_parse import parse_search_page
+from vacancy_filter import VacancyFilter
+
 # Настройка логирования
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -44,8 +48,15 @@ SETTING_TOKEN, SETTING_RESUME, SETTING_LETTER, SETTING_URL = range(4)
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
 CONFIG_FILE = DATA_DIR / "bot_config.json"
-APPLIED_FILE = DATA_DIR / "applied_vacancies.json"
 STATS_FILE = DATA_DIR / "stats.json"
+# Общая с multi-v2.py база откликов
+DB_FILE = DATA_DIR / "vacancies.db"
+# Старые JSON-хранилища: импортируются в DB_FILE при первом запуске
+APPLIED_FILE = DATA_DIR / "applied_vacancies.json"
+TEST_REQUIRED_FILE = DATA_DIR / "test_required_vacancies.json"
+
+STORE = VacancyStore(DB_FILE)
+STORE.import_json(APPLIED_FILE, TEST_REQUIRED_FILE)
 
 
 class HHBot:
@@ -56,6 +67,9 @@ class HHBot:
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.config = self.load_config()
+        # Правила отбора (ключ "filters" в конфиге, см. vacancy_filter.py) - собираются один раз
+        self.vacancy_filter = VacancyFilter(self.config.get("filters"))
+        self.vacancy_info = {}  # id -> карточка со страницы поиска
         self.stats = self.load_stats()
         self.is_running = False
         self.current_task = None
@@ -78,7 +92,8 @@ class HHBot:
             "search_urls": [],
             "pages_per_url": 5,
             "response_delay": 3,
-            "resume_touch_interval_hours": 4
+            "resume_touch_interval_hours": 4,
+            "filters": {}
         }
     
     def save_config(self):
@@ -107,23 +122,9 @@ class HHBot:
         with open(STATS_FILE, 'w', encoding='utf-8') as f:
             json.dump(self.stats, f, ensure_ascii=False, indent=2)
     
-    def load_applied(self) -> set:
-        """Загрузить список уже откликнутых вакансий"""
-        if APPLIED_FILE.exists():
-            try:
-                with open(APPLIED_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return set(data.get("vacancy_ids", []))
-            except:
-                pass
-        return set()
-    
     def add_applied(self, vacancy_id: str):
         """Добавить вакансию в список откликнутых"""
-        data = {"vacancy_ids": list(self.load_applied())}
-        data["vacancy_ids"].append(vacancy_id)
-        with open(APPLIED_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        STORE.add_applied(TELEGRAM_ACCOUNT, vacancy_id)
     
     async def init_browser(self):
         """Инициализировать браузер"""
@@ -329,6 +330,11 @@ class HHBot:
                     logger.debug(f"Ошибка при обработке ссылки: {e}")
                     continue
             
+            # Карточки (название, компания, зарплата) нужны только для фильтра
+            if self.vacancy_filter:
+                _, records = parse_search_page(await self.page.content())
+                self.vacancy_info.update(records)
+            
             logger.info(f"Найдено {len(vacancy_ids)} уникальных вакансий на странице")
             return list(vacancy_ids)
         except Exception as e:
@@ -448,6 +454,10 @@ class HHBot:
                     elif "тест" in page_text.lower() or "test" in page_text.lower():
                         self.stats["total_tests"] = self.stats.get("total_tests", 0) + 1
                         self.save_stats()
+                        # Таблица тестов общая для всех аккаунтов multi-v2.py: туда - только по явному
+                        # маркеру ответа hh.ru, догадка по слову "тест" на странице остаётся в статистике бота
+                        if "test-required" in page_text:
+                            STORE.add_test(vacancy_id)
                         return "test", "Требуется пройти тест"
                     elif "лимит" in page_text.lower() or "limit" in page_text.lower():
                         return "limit", "Достигнут лимит откликов"
@@ -502,8 +512,6 @@ class HHBot:
                 return error_msg
             
             all_vacancies = []
-            applied = self.load_applied()
-            logger.info(f"Загружено {len(applied)} уже откликнутых вакансий")
             
             # Собираем вакансии
             urls = self.config["search_urls"]
@@ -547,11 +555,15 @@ class HHBot:
                         # Продолжаем со следующей страницей
                         continue
             
-            # Фильтруем уже откликнутые
+            # Фильтруем уже откликнутые и вакансии с тестами (список тестов общий с multi-v2.py)
             unique_vacancies = list(set(all_vacancies))
             logger.info(f"Всего найдено {len(unique_vacancies)} уникальных вакансий")
-            new_vacancies = [v for v in unique_vacancies if v not in applied]
-            logger.info(f"Новых вакансий для обработки: {len(new_vacancies)}")
+            new_ids, already_ids, test_ids = STORE.partition(TELEGRAM_ACCOUNT, unique_vacancies)
+            new_vacancies, rejected = self.vacancy_filter.apply(new_ids, self.vacancy_info)
+            self.vacancy_info = {}
+            logger.info(f"Новых вакансий для обработки: {len(new_vacancies)} "
+                        f"(уже откликались: {len(already_ids)}, с тестом: {len(test_ids)}, "
+                        f"отсеяно фильтром: {sum(rejected.values())} {dict(rejected)})")
             
             if not new_vacancies:
                 return f"Найдено {len(unique_vacancies)} вакансий, все уже обработаны"
@@ -739,6 +751,9 @@ async def show_stats(query):
     total = stats.get("total_responses", 0)
     tests = stats.get("total_tests", 0)
     errors = stats.get("total_errors", 0)
+    stored = STORE.get_stats()
+    stored_total = stored["by_acc"].get(TELEGRAM_ACCOUNT, 0)
+    stored_today = stored["today_by_acc"].get(TELEGRAM_ACCOUNT, 0)
     
     last_touch = stats.get("last_resume_touch")
     if last_touch:
@@ -758,6 +773,7 @@ async def show_stats(query):
         f"✅ Всего откликов: {total}\n"
         f"🧪 Требуют тест: {tests}\n"
         f"❌ Ошибок: {errors}\n"
+        f"💾 В базе: {stored_total} (сегодня {stored_today})\n"
         f"📤 Последнее поднятие резюме: {last_touch_str}\n\n"
         f"🔗 URL для поиска: {len(config.get('search_urls', []))}",
         reply_markup=reply_markup
@@ -1166,7 +1182,10 @@ def main():
     
     # Запускаем бота
     print("🤖 Бот запущен...")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    try:
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
+    finally:
+        STORE.close()  # снимок индекса ID и сворачивание журнала
 
 
 if __name__ == "__main__":
@@ -0,0 +1,89 @@
+"""
+Фильтр вакансий перед откликом
+==============================
+Правила аккаунта (ключ "filters" в accounts_data) проверяются по карточкам со страницы поиска
+(см. hh_parse.parse_search_page), до того как на вакансию будет потрачен отклик из дневного лимита.
+
+    "filters": {
+        "salary_min": 150000,                   # зарплата (верхняя граница вилки) не ниже, в рублях
+        "title_include": ["qa", "тестиров"],    # в названии есть хотя бы одно слово
+        "title_exclude": ["senior", "lead"],    # в названии нет ни одного
+        "exclude_employers": ["Рога и копыта"], # работодатели, которым не откликаемся
+        "areas": ["Москва"],                    # города (если город на карточке указан)
+    }
+
+Чего в карточке нет (зарплата не указана, карточки нет вовсе), то правилом не отсекается.
+Списки слов и работодателей собираются в KeywordMatcher (см. keywords.py) один раз при создании
+фильтра; apply() проверяет названия и компании всей пачки одним проходом на список.
+"""
+
+from collections import Counter
+
+from keywords import KeywordMatcher
+
+
+class VacancyFilter:
+    """Правила одного аккаунта, проверяемые пачкой по карточкам вакансий"""
+
+    def __init__(self, rules: dict = None):
+        rules = rules or {}
+        self.salary_min = rules.get("salary_min")
+        self.title_include = KeywordMatcher(rules.get("title_include", []))
+        self.title_exclude = KeywordMatcher(rules.get("title_exclude", []))
+        self.exclude_employers = KeywordMatcher(rules.get("exclude_employers", []))
+        self.areas = {area.casefold() for area in rules.get("areas", [])}
+
+    def __bool__(self) -> bool:
+        return bool(self.salary_min or self.title_include or self.title_exclude
+                    or self.exclude_employers or self.areas)
+
+    def _check(self, record: dict, included: bool, excluded: bool, employer: bool):
+        """
+        Правила по карточке и уже найденным совпадениям слов: имя отсекающего правила или None.
+        Вакансия засчитывается первому сработавшему правилу (зарплата, слова, работодатель, город).
+        """
+        if self.salary_min:
+            top = record.get("salary_to") or record.get("salary_from")
+            if top and record.get("currency") in (None, "RUR") and top < self.salary_min:
+                return "salary"
+
+        if record.get("title"):
+            if self.title_include and not included:
+                return "title_include"
+            if excluded:
+                return "title_exclude"
+
+        if employer:
+            return "employer"
+
+        area = (record.get("area") or "").casefold()
+        if area and self.areas and area not in self.areas:
+            return "area"
+
+        return None
+
+    def apply(self, vacancy_ids, records: dict) -> tuple:
+        """
+        Разделить ID на прошедшие и отсечённые.
+        Возвращает (список прошедших ID, Counter {правило: сколько отсечено}).
+        """
+        if not self:
+            return list(vacancy_ids), Counter()
+        vacancy_ids = list(vacancy_ids)
+        # Названия и компании всей пачки - по одному проходу на каждый список слов
+        titles = {vid: (records.get(vid) or {}).get("title") for vid in vacancy_ids}
+        companies = {vid: (records.get(vid) or {}).get("company") for vid in vacancy_ids}
+        included = self.title_include.scan(titles)
+        excluded = self.title_exclude.scan(titles)
+        employers = self.exclude_employers.scan(companies)
+
+        passed = []
+        rejected = Counter()
+        for vid in vacancy_ids:
+            record = records.get(vid)
+            rule = self._check(record, vid in included, vid in excluded, vid in employers) if record else None
+            if rule is None:
+                passed.append(vid)
+            else:
+                rejected[rule] += 1
+        return passed, rejected